@@ -3,22 +3,33 @@ import zipfile
 import datetime
 import shutil
 import mimetypes
-import json
 import threading
-from flask import Flask, request, render_template, redirect, url_for, flash, send_from_directory, jsonify, Response
+from flask import Flask, request, render_template, redirect, url_for, flash, send_file, jsonify, Response, g, has_request_context
 from werkzeug.utils import secure_filename
 from parser import parse_tilda_export
-from migration import MigrationManager
+from migration import MigrationManager, load_parsed_data
 from progress_tracker import ProgressTracker
+import json_utils
 import time
 
 # Define allowed file extensions
 ALLOWED_EXTENSIONS = {'zip'}
 
+# Text files larger than this are streamed raw instead of rendered in a template
+VIEW_FILE_MAX_BYTES = 1024 * 1024
+
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.urandom(24)
 
+# JSON responses are only consumed by the dashboard's scripts, so skip key
+# sorting and the debug-mode pretty printing on every status poll.
+app.json.sort_keys = False
+app.json.compact = True
+
+# Let the front-end web server (Nginx/Apache) deliver files via X-Sendfile
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() == 'true'
+
 # Define path for projects
 app.config['PROJECTS_FOLDER'] = 'projects'
 os.makedirs(app.config['PROJECTS_FOLDER'], exist_ok=True)
@@ -27,24 +38,101 @@ def allowed_file(filename):
     """Check if the file has an allowed extension."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def list_directory(path):
+    """Split a directory's entries into sorted lists of folder and file names."""
+    dirs, files = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                dirs.append(entry.name)
+            elif entry.is_file():
+                files.append(entry.name)
+    dirs.sort()
+    files.sort()
+    return dirs, files
+
+def directory_has_entries(path):
+    """Return True if path is a directory containing at least one entry."""
+    try:
+        with os.scandir(path) as entries:
+            return next(entries, None) is not None
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
 def get_projects():
     """Scan the projects directory and return a list of project names."""
-    projects = []
-    for item in os.listdir(app.config['PROJECTS_FOLDER']):
-        if os.path.isdir(os.path.join(app.config['PROJECTS_FOLDER'], item)):
-            projects.append(item)
-    return sorted(projects)
+    projects, _ = list_directory(app.config['PROJECTS_FOLDER'])
+    return projects
+
+# Registry of known projects so the hot routes can resolve a project without
+# touching the filesystem. Kept in sync by create/delete/rename.
+_projects_lock = threading.Lock()
+_project_paths = {}
+
+def register_project(project_name):
+    """Add a project to the in-memory registry."""
+    with _projects_lock:
+        _project_paths[project_name] = os.path.join(app.config['PROJECTS_FOLDER'], project_name)
+
+def unregister_project(project_name):
+    """Remove a project from the in-memory registry."""
+    with _projects_lock:
+        _project_paths.pop(project_name, None)
+
+def forget_missing_project(project_name, project_path):
+    """Return True, and drop the project from the registry, if its directory is gone.
+
+    Registry hits skip the filesystem, so a project removed outside the app is
+    only noticed when a route fails; call this on those error paths only.
+    """
+    if os.path.isdir(project_path):
+        return False
+    unregister_project(project_name)
+    return True
+
+def load_project_registry():
+    """Populate the registry from the projects directory."""
+    for project_name in get_projects():
+        register_project(project_name)
 
 def get_secure_project_path(project_name):
     """Get and validate the absolute path for a project."""
+    project_path = _project_paths.get(project_name)
+    if project_path:
+        return project_path
+
+    # Fall back to the filesystem for projects created out of band. Only
+    # names create_project could have produced are accepted, since a hit is
+    # remembered for the lifetime of the process.
+    if not project_name or secure_filename(project_name) != project_name:
+        return None
     project_path = os.path.join(app.config['PROJECTS_FOLDER'], project_name)
     # Prevent traversal attacks
     if not os.path.normpath(project_path).startswith(os.path.normpath(app.config['PROJECTS_FOLDER'])):
         return None
     if not os.path.isdir(project_path):
         return None
+    # Remember it so later requests skip the filesystem check
+    register_project(project_name)
     return project_path
 
+load_project_registry()
+
+def cached_for_request(loader, project_path):
+    """Call loader(project_path) at most once per request and reuse the result.
+
+    Dashboard routes build the workflow status, statistics and quality report
+    from the same parsed data and migration history; this keeps each of those
+    reads to a single pass over the disk per request.
+    """
+    if not has_request_context():
+        return loader(project_path)
+    cache = g.setdefault('project_data_cache', {})
+    key = (loader, project_path)
+    if key not in cache:
+        cache[key] = loader(project_path)
+    return cache[key]
+
 def save_parsed_data(project_path, data):
     """Saves the structured data into a directory with separate JSON files."""
     output_dir = os.path.join(project_path, 'parsed_output')
@@ -58,8 +146,7 @@ def save_parsed_data(project_path, data):
 
     # Save the menu
     menu_data = data.get('menu', [])
-    with open(os.path.join(output_dir, 'menu.json'), 'w', encoding='utf-8') as f:
-        json.dump(menu_data, f, indent=4)
+    json_utils.dump_file(menu_data, os.path.join(output_dir, 'menu.json'))
 
     # Save each page as a separate JSON file
     for page in data.get('pages', []):
@@ -67,32 +154,7 @@ def save_parsed_data(project_path, data):
         if not slug:
             slug = 'home'
         filename = f"{secure_filename(slug)}.json"
-        with open(os.path.join(pages_dir, filename), 'w', encoding='utf-8') as f:
-            json.dump(page, f, indent=4)
-
-def load_parsed_data(project_path):
-    """Loads all parsed data from the structured directory."""
-    output_dir = os.path.join(project_path, 'parsed_output')
-    if not os.path.isdir(output_dir):
-        return None
-
-    data = {'menu': [], 'pages': []}
-    
-    # Load menu
-    menu_path = os.path.join(output_dir, 'menu.json')
-    if os.path.exists(menu_path):
-        with open(menu_path, 'r', encoding='utf-8') as f:
-            data['menu'] = json.load(f)
-
-    # Load pages
-    pages_dir = os.path.join(output_dir, 'pages')
-    if os.path.isdir(pages_dir):
-        for filename in os.listdir(pages_dir):
-            if filename.endswith('.json'):
-                with open(os.path.join(pages_dir, filename), 'r', encoding='utf-8') as f:
-                    data['pages'].append(json.load(f))
-                    
-    return data
+        json_utils.dump_file(page, os.path.join(pages_dir, filename))
 
 def get_secure_subpath(project_path, subpath):
     """Get and validate a subpath within a project's extracted folder."""
@@ -118,21 +180,21 @@ def get_workflow_status(project_path):
     
     # Check if files are uploaded
     upload_folder = os.path.join(project_path, 'upload')
-    if os.path.exists(upload_folder) and os.listdir(upload_folder):
+    if directory_has_entries(upload_folder):
         status['files_uploaded'] = True
     
     # Check if files are extracted
     extracted_folder = os.path.join(project_path, 'extracted')
-    if os.path.exists(extracted_folder) and os.listdir(extracted_folder):
+    if directory_has_entries(extracted_folder):
         status['files_extracted'] = True
     
     # Check if content is parsed
-    parsed_data = load_parsed_data(project_path)
+    parsed_data = cached_for_request(load_parsed_data, project_path)
     if parsed_data and parsed_data.get('pages'):
         status['content_parsed'] = True
     
     # Check if WordPress connection was tested
-    migration_history = MigrationManager.get_project_migration_history(project_path)
+    migration_history = cached_for_request(MigrationManager.get_project_migration_history, project_path)
     if migration_history:
         status['wordpress_tested'] = True
         # Check if any migration was completed successfully
@@ -159,7 +221,8 @@ def get_project_statistics(project_path):
     # Count uploaded files
     upload_folder = os.path.join(project_path, 'upload')
     if os.path.exists(upload_folder):
-        stats['uploaded_files_count'] = len([f for f in os.listdir(upload_folder) if os.path.isfile(os.path.join(upload_folder, f))])
+        with os.scandir(upload_folder) as entries:
+            stats['uploaded_files_count'] = sum(1 for entry in entries if entry.is_file())
     
     # Count extracted files
     extracted_folder = os.path.join(project_path, 'extracted')
@@ -168,7 +231,7 @@ def get_project_statistics(project_path):
             stats['extracted_files_count'] += len(files)
     
     # Analyze parsed data
-    parsed_data = load_parsed_data(project_path)
+    parsed_data = cached_for_request(load_parsed_data, project_path)
     if parsed_data:
         stats['parsed_pages_count'] = len(parsed_data.get('pages', []))
         stats['menu_items_count'] = len(parsed_data.get('menu', []))
@@ -178,10 +241,10 @@ def get_project_statistics(project_path):
             stats['total_content_blocks'] += len(page.get('content', []))
     
     # Analyze migration history
-    migration_history = MigrationManager.get_project_migration_history(project_path)
+    migration_history = cached_for_request(MigrationManager.get_project_migration_history, project_path)
     if migration_history:
         stats['migration_attempts'] = len(migration_history)
-        stats['successful_migrations'] = len([m for m in migration_history if m.get('status') == 'completed'])
+        stats['successful_migrations'] = sum(1 for m in migration_history if m.get('status') == 'completed')
         
         # Get last activity from most recent migration
         if migration_history:
@@ -204,16 +267,20 @@ def analyze_content_quality(parsed_data):
     pages = parsed_data.get('pages', [])
     menu = parsed_data.get('menu', [])
     
-    # Calculate statistics
+    # Calculate statistics and content type distribution in a single pass
     total_pages = len(pages)
-    total_content_blocks = sum(len(page.get('content', [])) for page in pages)
-    pages_with_content = len([page for page in pages if page.get('content')])
-    pages_with_titles = len([page for page in pages if page.get('title') and page['title'].strip()])
-    
-    # Content type distribution
+    total_content_blocks = 0
+    pages_with_content = 0
+    pages_with_titles = 0
     content_types = {'heading': 0, 'paragraph': 0, 'button': 0, 'image': 0, 'other': 0}
     for page in pages:
-        for block in page.get('content', []):
+        content = page.get('content', [])
+        total_content_blocks += len(content)
+        if content:
+            pages_with_content += 1
+        if page.get('title') and page['title'].strip():
+            pages_with_titles += 1
+        for block in content:
             block_type = block.get('type', 'other')
             if block_type in content_types:
                 content_types[block_type] += 1
@@ -263,7 +330,7 @@ def analyze_content_quality(parsed_data):
     # Overall score considers completeness and content diversity
     diversity_score = 0
     if total_content_blocks > 0:
-        non_zero_types = len([count for count in content_types.values() if count > 0])
+        non_zero_types = sum(1 for count in content_types.values() if count > 0)
         diversity_score = (non_zero_types / len(content_types)) * 100
     
     overall_score = (completeness_score * 0.7 + diversity_score * 0.3)
@@ -303,6 +370,16 @@ def get_page_content_quality(page):
     issues = []
     suggestions = []
     
+    # Count block types and text length in one pass over the content
+    type_counts = {'heading': 0, 'paragraph': 0, 'button': 0}
+    total_text_length = 0
+    for block in content:
+        block_type = block.get('type')
+        if block_type in type_counts:
+            type_counts[block_type] += 1
+        if block.get('text'):
+            total_text_length += len(block['text'])
+    
     # Check title quality
     if not title:
         issues.append('Missing page title')
@@ -319,19 +396,15 @@ def get_page_content_quality(page):
         issues.append('No content blocks found')
         suggestions.append('Check if page content was parsed correctly')
     else:
-        headings = [block for block in content if block.get('type') == 'heading']
-        paragraphs = [block for block in content if block.get('type') == 'paragraph']
-        
-        if not headings:
+        if not type_counts['heading']:
             issues.append('No headings found')
             suggestions.append('Add headings to improve content structure')
         
-        if not paragraphs:
+        if not type_counts['paragraph']:
             issues.append('No paragraph content found')
             suggestions.append('Check if text content is being parsed correctly')
         
         # Check content length
-        total_text_length = sum(len(block.get('text', '')) for block in content if block.get('text'))
         if total_text_length < 100:
             issues.append('Very little text content')
             suggestions.append('Ensure all page content is being captured')
@@ -355,10 +428,10 @@ def get_page_content_quality(page):
         'suggestions': suggestions,
         'content_stats': {
             'total_blocks': len(content),
-            'headings_count': len([b for b in content if b.get('type') == 'heading']),
-            'paragraphs_count': len([b for b in content if b.get('type') == 'paragraph']),
-            'buttons_count': len([b for b in content if b.get('type') == 'button']),
-            'text_length': sum(len(block.get('text', '')) for block in content if block.get('text'))
+            'headings_count': type_counts['heading'],
+            'paragraphs_count': type_counts['paragraph'],
+            'buttons_count': type_counts['button'],
+            'text_length': total_text_length
         }
     }
 
@@ -546,6 +619,7 @@ def create_project():
     else:
         os.makedirs(os.path.join(project_path, 'upload'))
         os.makedirs(os.path.join(project_path, 'extracted'))
+        register_project(sanitized_name)
         flash(f"Project '{sanitized_name}' created successfully.", 'success')
         
     return redirect(url_for('index'))
@@ -561,7 +635,7 @@ def project_view(project_name, subpath=''):
         return redirect(url_for('index'))
 
     # Load parsed data from the new structure
-    parsed_data = load_parsed_data(project_path)
+    parsed_data = cached_for_request(load_parsed_data, project_path)
     
     # Get workflow status and statistics for enhanced dashboard
     workflow_status = get_workflow_status(project_path)
@@ -573,13 +647,14 @@ def project_view(project_name, subpath=''):
 
     browse_path = get_secure_subpath(project_path, subpath)
     if not browse_path or not os.path.exists(browse_path):
+        if forget_missing_project(project_name, project_path):
+            flash(f"Project '{project_name}' not found.", 'error')
+            return redirect(url_for('index'))
         flash('Invalid file path.', 'error')
         return redirect(url_for('project_view', project_name=project_name))
 
-    # Scan the directory for files and folders
-    items = os.listdir(browse_path)
-    dirs = sorted([d for d in items if os.path.isdir(os.path.join(browse_path, d))])
-    files = sorted([f for f in items if os.path.isfile(os.path.join(browse_path, f))])
+    # Scan the directory for files and folders in a single pass
+    dirs, files = list_directory(browse_path)
 
     # Create breadcrumbs for navigation
     breadcrumbs = []
@@ -590,7 +665,7 @@ def project_view(project_name, subpath=''):
             breadcrumbs.append({'name': part, 'path': path_so_far})
             
     upload_folder = os.path.join(project_path, 'upload')
-    uploaded_files = [f for f in os.listdir(upload_folder) if os.path.isfile(os.path.join(upload_folder, f))]
+    _, uploaded_files = list_directory(upload_folder)
     
     return render_template('project.html', 
                            project_name=project_name, 
@@ -650,6 +725,9 @@ def run_parser(project_name):
             # Determine error type based on error message
             error_msg = structured_data['error']
             if "not found" in error_msg.lower():
+                if forget_missing_project(project_name, project_path):
+                    flash(f"Project '{project_name}' not found.", 'error')
+                    return redirect(url_for('index'))
                 error_info = handle_parser_error('no_extracted_files')
             elif "no html" in error_msg.lower():
                 error_info = handle_parser_error('no_html_files')
@@ -694,9 +772,9 @@ def download_json(project_name):
         return redirect(url_for('project_view', project_name=project_name))
 
     # To download the data, we'll zip the entire parsed_output directory
-    shutil.make_archive(os.path.join(project_path, 'parsed_data'), 'zip', output_dir)
+    archive_path = shutil.make_archive(os.path.join(project_path, 'parsed_data'), 'zip', output_dir)
     
-    return send_from_directory(directory=project_path, path='parsed_data.zip', as_attachment=True)
+    return send_file(os.path.abspath(archive_path), as_attachment=True)
 
 
 @app.route('/project/<project_name>/view/<path:filepath>')
@@ -717,6 +795,9 @@ def view_file(project_name, filepath):
         mimetype, _ = mimetypes.guess_type(file_to_view)
         is_text = mimetype and mimetype.startswith('text/')
         
+        if is_text and os.path.getsize(file_to_view) > VIEW_FILE_MAX_BYTES:
+            return redirect(url_for('raw_file', project_name=project_name, filepath=filepath))
+
         if is_text:
             with open(file_to_view, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
@@ -729,6 +810,27 @@ def view_file(project_name, filepath):
         flash(f"Could not read file: {e}", 'error')
         return redirect(url_for('project_view', project_name=project_name, subpath=os.path.dirname(filepath)))
 
+@app.route('/project/<project_name>/raw/<path:filepath>')
+def raw_file(project_name, filepath):
+    """Send a file from the extracted folder as-is."""
+    project_path = get_secure_project_path(project_name)
+    if not project_path:
+        flash(f"Project '{project_name}' not found.", 'error')
+        return redirect(url_for('index'))
+
+    file_to_send = get_secure_subpath(project_path, filepath)
+    if not file_to_send or not os.path.isfile(file_to_send):
+        flash('File not found or is not a regular file.', 'error')
+        return redirect(url_for('project_view', project_name=project_name))
+
+    # Exported pages contain scripts, so never let the browser render them
+    # on the dashboard's origin: text is shown as plain text, anything else
+    # is downloaded.
+    mimetype, _ = mimetypes.guess_type(file_to_send)
+    if mimetype and mimetype.startswith('text/'):
+        return send_file(file_to_send, mimetype='text/plain')
+    return send_file(file_to_send, as_attachment=True)
+
 @app.route('/project/<project_name>/page/<path:page_slug>')
 def view_parsed_page(project_name, page_slug):
     """Display the parsed content of a specific page with copy functionality."""
@@ -773,9 +875,15 @@ def delete_project(project_name):
     
     try:
         shutil.rmtree(project_path)
-        flash(f"Project '{project_name}' has been deleted.", 'success')
+    except FileNotFoundError:
+        # Already removed outside the app; only the registry entry is left
+        pass
     except OSError as e:
         flash(f"Error deleting project '{project_name}': {e}", 'error')
+        return redirect(url_for('index'))
+    unregister_project(project_name)
+    ProgressTracker.forget_migration_history(project_path)
+    flash(f"Project '{project_name}' has been deleted.", 'success')
 
     return redirect(url_for('index'))
 
@@ -809,8 +917,15 @@ def rename_project(project_name):
         
         try:
             os.rename(project_path, new_project_path)
+            unregister_project(project_name)
+            ProgressTracker.forget_migration_history(project_path)
+            register_project(sanitized_new_name)
             flash(f"Project '{project_name}' has been renamed to '{sanitized_new_name}'.", 'success')
             return redirect(url_for('project_view', project_name=sanitized_new_name))
+        except FileNotFoundError:
+            forget_missing_project(project_name, project_path)
+            flash(f"Project '{project_name}' not found.", 'error')
+            return redirect(url_for('index'))
         except OSError as e:
             flash(f"Error renaming project: {e}", 'error')
             return redirect(url_for('index'))
@@ -846,7 +961,13 @@ def upload_file(project_name):
         # Clear previous uploads before saving new one
         if os.path.exists(upload_path):
             shutil.rmtree(upload_path)
-        os.makedirs(upload_path)
+        try:
+            os.mkdir(upload_path)
+        except FileNotFoundError:
+            # The project directory was removed outside the app
+            unregister_project(project_name)
+            flash(f"Project '{project_name}' not found.", 'error')
+            return redirect(url_for('index'))
         saved_filepath = os.path.join(upload_path, filename)
         file.save(saved_filepath)
 
@@ -944,6 +1065,11 @@ def start_wordpress_migration(project_name):
     if project_name in active_migrations:
         return jsonify({'success': False, 'message': 'Migration already in progress for this project'})
     
+    # The migration writes its logs into the project, which would recreate a
+    # directory removed outside the app; check once before starting
+    if forget_missing_project(project_name, project_path):
+        return jsonify({'success': False, 'message': 'Project not found'})
+    
     try:
         # Create migration manager
         migration_manager = MigrationManager(project_path, wp_site_url, wp_username, wp_password)
@@ -1001,7 +1127,7 @@ def get_migration_status(project_name):
         latest = migration_history[0]
         return jsonify({
             'status': latest,
-            'logs': ProgressTracker.get_migration_log(project_path, latest['migration_id']).split('\n')[-20:],
+            'logs': ProgressTracker.get_migration_log_tail(project_path, latest['migration_id'], 20).split('\n')[-20:],
             'is_active': False
         })
     
@@ -1029,7 +1155,7 @@ def migration_log_stream(project_name):
     
     def generate():
         last_percentage = -1
-        last_log_count = 0
+        last_log_seq = 0
         completion_sent = False
         
         while True:
@@ -1037,24 +1163,24 @@ def migration_log_stream(project_name):
                 if project_name in active_migrations:
                     migration_manager = active_migrations[project_name]
                     status = migration_manager.get_migration_status()
-                    logs = migration_manager.get_migration_logs(100)
+                    new_logs, log_seq = migration_manager.get_migration_logs_since(last_log_seq)
                     
                     # Send updates only if there are changes
                     if (status['percentage'] != last_percentage or 
-                        len(logs) != last_log_count or
+                        new_logs or
                         status['status'] in ['completed', 'failed']):
                         
                         data = {
                             'percentage': status['percentage'],
                             'current_operation': status['current_operation'],
                             'status': status['status'],
-                            'new_logs': logs[last_log_count:] if len(logs) > last_log_count else []
+                            'new_logs': new_logs
                         }
                         
-                        yield f"data: {json.dumps(data)}\n\n"
+                        yield f"data: {json_utils.dumps(data)}\n\n"
                         
                         last_percentage = status['percentage']
-                        last_log_count = len(logs)
+                        last_log_seq = log_seq
                         
                         # Mark completion as sent and break after a small delay
                         if status['status'] in ['completed', 'failed'] and not completion_sent:
@@ -1078,7 +1204,7 @@ def migration_log_stream(project_name):
                                 'status': latest['status'],
                                 'new_logs': []
                             }
-                            yield f"data: {json.dumps(data)}\n\n"
+                            yield f"data: {json_utils.dumps(data)}\n\n"
                             time.sleep(1)
                             break
                     
@@ -1102,6 +1228,10 @@ def get_project_workflow_status(project_name):
         return jsonify({'error': 'Project not found'}), 404
     
     workflow_status = get_workflow_status(project_path)
+    # A removed project reads as one with nothing uploaded, so only that
+    # case needs to check the directory is still there
+    if not workflow_status['files_uploaded'] and forget_missing_project(project_name, project_path):
+        return jsonify({'error': 'Project not found'}), 404
     project_stats = get_project_statistics(project_path)
     
     return jsonify({
@@ -1185,4 +1315,5 @@ def generate_workflow_recommendations(workflow_status, stats):
     return recommendations
 
 if __name__ == "__main__":
-    app.run(debug=True) 
\ No newline at end of file
+    # Development server only; see wsgi.py for running under gunicorn
+    app.run(debug=os.environ.get('FLASK_DEBUG', 'true').lower() == 'true') 
\ No newline at end of file
@@ -1,11 +1,62 @@
 import os
-import json
+import re
 import time
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
-from wordpress_api import WordPressAPI
+from wordpress_api import WordPressAPI, BATCH_MAX_REQUESTS
 from wordpress_menu_manager import WordPressMenuCreator
 from progress_tracker import ProgressTracker
+import json_utils
+
+# Upper bound on threads used to read parsed page files
+LOAD_WORKERS = 8
+
+# Upper bound on concurrent page creations within one hierarchy level
+MIGRATION_WORKERS = 8
+
+# WordPress stores slugs through sanitize_title(). For slugs made only of
+# these characters its result is predictable, so the prefetched page list can
+# answer for them without asking the API.
+PREDICTABLE_SLUG_RE = re.compile(r'[A-Za-z0-9_./-]+')
+DASH_RUN_RE = re.compile(r'-+')
+
+def wordpress_slug(slug):
+    """Return the slug WordPress stores for a requested one ('Services/HVAC' -> 'serviceshvac').
+
+    Mirrors sanitize_title() for plain ASCII slugs: lowercase, '.' becomes '-',
+    '/' is dropped, runs of dashes collapse and the ends are trimmed. Returns
+    None when the outcome depends on the site (accents, non-Latin text, ...).
+    """
+    if not PREDICTABLE_SLUG_RE.fullmatch(slug):
+        return None
+    return DASH_RUN_RE.sub('-', slug.lower().replace('.', '-').replace('/', '')).strip('-') or None
+
+def load_parsed_data(project_path):
+    """Load the parsed Tilda data (menu and pages) from a project."""
+    output_dir = os.path.join(project_path, 'parsed_output')
+    if not os.path.isdir(output_dir):
+        return None
+
+    data = {'menu': [], 'pages': []}
+    
+    # Load menu
+    menu_path = os.path.join(output_dir, 'menu.json')
+    if os.path.exists(menu_path):
+        data['menu'] = json_utils.load_file(menu_path)
+
+    # Load pages, reading the files concurrently but keeping a stable order
+    pages_dir = os.path.join(output_dir, 'pages')
+    if os.path.isdir(pages_dir):
+        with os.scandir(pages_dir) as entries:
+            page_paths = sorted(entry.path for entry in entries
+                                if entry.name.endswith('.json') and entry.is_file())
+        if page_paths:
+            with ThreadPoolExecutor(max_workers=min(LOAD_WORKERS, len(page_paths))) as executor:
+                data['pages'] = list(executor.map(json_utils.load_file, page_paths))
+                        
+    return data
 
 class MigrationManager:
     """Manages the migration process from Tilda to WordPress."""
@@ -16,6 +67,10 @@ class MigrationManager:
         self.wp_api = WordPressAPI(wp_site_url, wp_username, wp_password)
         self.tracker = None
         self.page_mapping = {}  # Maps Tilda slug to WordPress page ID for hierarchy
+        self._mapping_lock = threading.Lock()
+        self.existing_slugs = None  # WordPress slug -> page ID, prefetched per migration
+        self.resolved_slugs = {}  # WordPress slug -> page ID or None, looked up per level without the prefetch
+        self.batch_pages = False  # Create pages through the WordPress batch endpoint
         
     def validate_connection(self):
         """Test WordPress connection before starting migration."""
@@ -23,27 +78,7 @@ class MigrationManager:
     
     def load_parsed_data(self):
         """Load the parsed Tilda data from the project."""
-        output_dir = os.path.join(self.project_path, 'parsed_output')
-        if not os.path.isdir(output_dir):
-            return None
-
-        data = {'menu': [], 'pages': []}
-        
-        # Load menu
-        menu_path = os.path.join(output_dir, 'menu.json')
-        if os.path.exists(menu_path):
-            with open(menu_path, 'r', encoding='utf-8') as f:
-                data['menu'] = json.load(f)
-
-        # Load pages
-        pages_dir = os.path.join(output_dir, 'pages')
-        if os.path.isdir(pages_dir):
-            for filename in os.listdir(pages_dir):
-                if filename.endswith('.json'):
-                    with open(os.path.join(pages_dir, filename), 'r', encoding='utf-8') as f:
-                        data['pages'].append(json.load(f))
-                        
-        return data
+        return load_parsed_data(self.project_path)
     
     def analyze_page_hierarchy(self, pages):
         """Analyze and organize pages by hierarchy based on their slugs."""
@@ -51,16 +86,14 @@ class MigrationManager:
         root_pages = []
         
         for page in pages:
-            slug = page['slug']
-            slug_parts = slug.strip('/').split('/')
+            parent_path, sep, _ = page['slug'].strip('/').rpartition('/')
             
-            if len(slug_parts) == 1 or slug == '/':
+            if not sep:
                 # Root level page
                 root_pages.append(page)
             else:
-                # Child page - find its parent
-                parent_slug = '/' + '/'.join(slug_parts[:-1])
-                hierarchy[parent_slug].append(page)
+                # Child page - its parent is everything before the last segment
+                hierarchy['/' + parent_path].append(page)
         
         return root_pages, hierarchy
     
@@ -93,6 +126,19 @@ class MigrationManager:
             
             self.tracker.log_operation(f"✓ {connection_result['message']}")
             
+            # Fetch existing pages once instead of looking up every slug
+            self.tracker.log_operation("Fetching existing WordPress pages...")
+            existing_pages = self.wp_api.get_pages_list()
+            if existing_pages is None:
+                self.existing_slugs = None
+                self.tracker.log_operation("Could not list existing pages, checking slugs one by one", "WARNING")
+            else:
+                self.existing_slugs = {p['slug']: p['id'] for p in existing_pages}
+            
+            self.batch_pages = self.wp_api.supports_batch('/wp/v2/pages')
+            if self.batch_pages:
+                self.tracker.log_operation(f"Creating pages in batches of up to {BATCH_MAX_REQUESTS}")
+            
             # Start migration
             self.tracker.start_migration(len(pages))
             
@@ -132,29 +178,92 @@ class MigrationManager:
     
     def _migrate_pages_hierarchical(self, root_pages, hierarchy, page_template=''):
         """Migrate pages maintaining hierarchy."""
-        # First, migrate all root pages
-        for page in root_pages:
-            self._migrate_single_page(page, template=page_template)
-        
-        # Then migrate child pages recursively
-        for page in root_pages:
-            self._migrate_children(page['slug'], hierarchy, page_template)
+        # Walk the tree one level at a time. Siblings only depend on their
+        # parent, so every page in a level is created concurrently once the
+        # previous level has finished and its WordPress IDs are known.
+        level = [(page, None) for page in root_pages]
+        while level:
+            if self.existing_slugs is None:
+                self._resolve_level_slugs(level)
+            # Siblings that map to the same WordPress slug would all pass the
+            # existence check if created together, so only the first of them
+            # joins the concurrent pass
+            distinct, repeats = self._split_slug_repeats(level)
+            parent_ids = [self.page_mapping.get(parent_slug) if parent_slug else None
+                          for _, parent_slug in distinct]
+            pages = [page for page, _ in distinct]
+            workers = min(MIGRATION_WORKERS, len(distinct))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                if self.batch_pages:
+                    # Check which pages already exist concurrently, then create
+                    # the rest of the level through the batch endpoint
+                    page_requests = list(executor.map(
+                        lambda page, parent_id: self._prepare_page_logged(page, parent_id, template=page_template),
+                        pages,
+                        parent_ids
+                    ))
+                    self._migrate_page_batch([(page, request) for page, request
+                                              in zip(pages, page_requests) if request])
+                else:
+                    list(executor.map(
+                        lambda page, parent_id: self._migrate_single_page(page, parent_id, template=page_template),
+                        pages,
+                        parent_ids
+                    ))
+            # The rest run one at a time, and find the page created above
+            for page, parent_slug in repeats:
+                parent_id = self.page_mapping.get(parent_slug) if parent_slug else None
+                self._migrate_single_page(page, parent_id, template=page_template)
+            
+            level = [(child_page, page['slug'])
+                     for page, _ in level
+                     for child_page in hierarchy.get(page['slug'], [])]
     
-    def _migrate_children(self, parent_slug, hierarchy, page_template=''):
-        """Recursively migrate child pages."""
-        children = hierarchy.get(parent_slug, [])
-        parent_wp_id = self.page_mapping.get(parent_slug)
-        
-        for child_page in children:
-            self._migrate_single_page(child_page, parent_wp_id, template=page_template)
-            # Recursively migrate grandchildren
-            self._migrate_children(child_page['slug'], hierarchy, page_template)
+    def _split_slug_repeats(self, level):
+        """Split a level into pages with distinct WordPress slugs and the siblings repeating one."""
+        distinct, repeats = [], []
+        seen = set()
+        for item in level:
+            slug = item[0]['slug'].strip('/') or 'home'
+            key = wordpress_slug(slug) or slug
+            (repeats if key in seen else distinct).append(item)
+            seen.add(key)
+        return distinct, repeats
     
     def _migrate_single_page(self, page, parent_id=None, template=''):
         """Migrate a single page to WordPress."""
+        try:
+            request = self._prepare_page(page, parent_id, template)
+            if request:
+                self._record_page_result(page, request['slug'], self.wp_api.create_page(**request))
+        except Exception as e:
+            self.tracker.log_page_failure(page['title'], page['slug'], str(e))
+    
+    def _prepare_page_logged(self, page, parent_id=None, template=''):
+        """Run _prepare_page, logging an error as a failed page instead of raising it."""
+        try:
+            return self._prepare_page(page, parent_id, template)
+        except Exception as e:
+            self.tracker.log_page_failure(page['title'], page['slug'], str(e))
+            return None
+    
+    def _migrate_page_batch(self, pending):
+        """Create (page, create_page arguments) pairs through the batch endpoint."""
+        if not pending:
+            return
+        try:
+            results = self.wp_api.create_pages_bulk([request for _, request in pending])
+        except Exception as e:
+            for page, _ in pending:
+                self.tracker.log_page_failure(page['title'], page['slug'], str(e))
+            return
+        for (page, request), result in zip(pending, results):
+            self._record_page_result(page, request['slug'], result)
+    
+    def _prepare_page(self, page, parent_id=None, template=''):
+        """Return create_page arguments for a page, or None if it already exists."""
         title = page['title']
         slug = page['slug'].strip('/')
-        content_blocks = page.get('content', [])
         
         # Handle root page slug
         if not slug:
@@ -162,38 +271,71 @@ class MigrationManager:
         
         self.tracker.log_operation(f"Creating page: {title} ({page['slug']})")
         
-        try:
-            # Check if page already exists
-            existing_page = self.wp_api.get_page_by_slug(slug)
-            if existing_page:
-                self.tracker.log_page_skipped(
-                    title, 
-                    page['slug'], 
-                    f"Page with slug '{slug}' already exists (ID: {existing_page['id']})"
-                )
-                # Still map it for hierarchy purposes
-                self.page_mapping[page['slug']] = existing_page['id']
-                return
-            
-            # Create the page
-            result = self.wp_api.create_page(
-                title=title,
-                slug=slug,
-                content_blocks=content_blocks,
-                parent_id=parent_id,
-                status='publish',
-                template=template
+        # Check if page already exists
+        existing_page = self._find_existing_page(slug)
+        if existing_page:
+            self.tracker.log_page_skipped(
+                title, 
+                page['slug'], 
+                f"Page with slug '{slug}' already exists (ID: {existing_page['id']})"
             )
-            
-            if result['success']:
-                # Store mapping for children
+            # Still map it for hierarchy purposes
+            with self._mapping_lock:
+                self.page_mapping[page['slug']] = existing_page['id']
+            return None
+        
+        return {
+            'title': title,
+            'slug': slug,
+            'content_blocks': page.get('content', []),
+            'parent_id': parent_id,
+            'status': 'publish',
+            'template': template
+        }
+    
+    def _record_page_result(self, page, slug, result):
+        """Log a create_page result and remember the new page for its children."""
+        if result['success']:
+            # Store mapping for children
+            with self._mapping_lock:
                 self.page_mapping[page['slug']] = result['page_id']
-                self.tracker.log_page_success(title, page['slug'], result['url'])
-            else:
-                self.tracker.log_page_failure(title, page['slug'], result['message'])
-                
-        except Exception as e:
-            self.tracker.log_page_failure(title, page['slug'], str(e))
+                stored_slug = result['data'].get('slug', slug)
+                if self.existing_slugs is not None:
+                    self.existing_slugs[stored_slug] = result['page_id']
+                else:
+                    self.resolved_slugs[stored_slug] = result['page_id']
+            self.tracker.log_page_success(page['title'], page['slug'], result['url'])
+        else:
+            self.tracker.log_page_failure(page['title'], page['slug'], result['message'])
+    
+    def _find_existing_page(self, slug):
+        """Look up a page by slug, using the prefetched or per-level lookups when they can answer."""
+        wp_slug = wordpress_slug(slug)
+        if wp_slug is not None:
+            if self.existing_slugs is not None:
+                page_id = self.existing_slugs.get(wp_slug)
+                return {'id': page_id} if page_id else None
+            if wp_slug in self.resolved_slugs:
+                page_id = self.resolved_slugs[wp_slug]
+                return {'id': page_id} if page_id else None
+        # WordPress may rewrite other slugs, so let the API resolve them
+        return self.wp_api.get_page_by_slug(slug)
+    
+    def _resolve_level_slugs(self, level):
+        """Look up every predictable slug of a hierarchy level with one query.
+        
+        Only used when the full page list could not be prefetched.
+        """
+        slugs = {wordpress_slug(page['slug'].strip('/') or 'home') for page, _ in level}
+        slugs.discard(None)
+        slugs.difference_update(self.resolved_slugs)
+        if not slugs:
+            return
+        found = self.wp_api.get_pages_by_slugs(sorted(slugs))
+        if found is None:
+            return
+        self.resolved_slugs.update(dict.fromkeys(slugs))
+        self.resolved_slugs.update((page['slug'], page['id']) for page in found)
     
     def _process_menu(self, menu_items):
         """Create primary menu for fuseservice theme using native WordPress 6.8+ REST API."""
@@ -261,6 +403,12 @@ class MigrationManager:
             return []
         return self.tracker.get_recent_logs(limit)
     
+    def get_migration_logs_since(self, seq):
+        """Get migration logs written after the given sequence number."""
+        if not self.tracker:
+            return [], seq
+        return self.tracker.get_logs_since(seq)
+    
     @staticmethod
     def get_project_migration_history(project_path):
         """Get migration history for a project."""
@@ -273,8 +421,7 @@ class MigrationManager:
         log_content = ProgressTracker.get_migration_log(project_path, migration_id)
         
         try:
-            with open(status_file, 'r', encoding='utf-8') as f:
-                status = json.load(f)
+            status = json_utils.load_file(status_file)
             return {
                 'status': status,
                 'log': log_content
@@ -1,6 +1,193 @@
 import os
-import json
-from bs4 import BeautifulSoup
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import lxml.html
+from lxml import etree
+import json_utils
+
+# Exports with at least this many HTML files are parsed on a process pool
+# when more than one CPU is available; smaller ones parse faster than the
+# pool takes to start
+PARALLEL_PARSE_MIN_FILES = 32
+
+# The parser runs inside a threaded web server, and forking a process with
+# live threads can leave the children stuck on locks they inherited, so
+# workers start from a clean interpreter instead
+PARSE_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Parsed pages are cached per project so re-parsing an unchanged export is
+# cheap. Bump the version whenever parsing output changes.
+PARSE_CACHE_FILE = 'parse_cache.json'
+PARSE_CACHE_VERSION = 1
+
+def _class_token(name):
+    """XPath predicate matching elements whose class list contains name."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Text inside these tags is code or annotation rather than page content, so
+# it only counts when reading one of these tags directly
+_STRING_CONTAINERS = ('script', 'style', 'template', 'rt', 'rp')
+_CONTAINER_AXIS = 'ancestor::*[self::script or self::style or self::template or self::rt or self::rp]'
+_TEXT_NODES = etree.XPath(f'.//text()[not({_CONTAINER_AXIS})]', smart_strings=False)
+_CONTAINER_TEXT_NODES = etree.XPath(f'.//text()[{_CONTAINER_AXIS}[1][name() = $tag]]', smart_strings=False)
+
+# Compiled XPath equivalents of the CSS selectors used while reading menus.
+# Selectors applied to the whole document start with '//', the rest are
+# evaluated below the element they are called on.
+_SELECTORS = {
+    'nav.t228__centercontainer': etree.XPath(f"//nav[{_class_token('t228__centercontainer')}]"),
+    'nav.t456__rightwrapper': etree.XPath(f"//nav[{_class_token('t456__rightwrapper')}]"),
+    'nav.t-menu': etree.XPath(f"//nav[{_class_token('t-menu')}]"),
+    'div.t-menu': etree.XPath(f"//div[{_class_token('t-menu')}]"),
+    'nav[class*="menu"]': etree.XPath("//nav[contains(@class, 'menu')]"),
+    'div[class*="menu"]': etree.XPath("//div[contains(@class, 'menu')]"),
+    'ul.t-menu__list, ul[class*="menu"], ul[class*="list"]': etree.XPath(
+        f"//ul[{_class_token('t-menu__list')} or contains(@class, 'menu') or contains(@class, 'list')]"
+    ),
+    '.t228__list_item > a.t-menu__link-item': etree.XPath(
+        f".//a[{_class_token('t-menu__link-item')}][parent::*[{_class_token('t228__list_item')}]]"
+    ),
+    '.t456__list_item > a.t-menu__link-item': etree.XPath(
+        f".//a[{_class_token('t-menu__link-item')}][parent::*[{_class_token('t456__list_item')}]]"
+    ),
+    'a.t-menu__link-item': etree.XPath(f".//a[{_class_token('t-menu__link-item')}]"),
+    'a[class*="menu"]': etree.XPath(".//a[contains(@class, 'menu')]"),
+    'li > a': etree.XPath('.//a[parent::li]'),
+    '.t794__list_item a': etree.XPath(f".//a[ancestor::*[{_class_token('t794__list_item')}]]"),
+    '.t794__link': etree.XPath(f".//*[{_class_token('t794__link')}]"),
+    'a[role="menuitem"]': etree.XPath(".//a[@role='menuitem']"),
+    'li a': etree.XPath('.//a[ancestor::li]'),
+    'a': etree.XPath('.//a'),
+}
+
+# Navigation containers used by Tilda, tried in order
+NAVIGATION_SELECTORS = (
+    # T228 pattern (original)
+    'nav.t228__centercontainer',
+    # T456 pattern
+    'nav.t456__rightwrapper',
+    # Generic patterns as fallbacks
+    'nav.t-menu',
+    'div.t-menu',
+    # Look for any nav with menu classes
+    'nav[class*="menu"]',
+    'div[class*="menu"]'
+)
+
+# Menu link selector for navigation blocks carrying a known block class
+MENU_LIST_SELECTORS = {
+    't228': '.t228__list_item > a.t-menu__link-item',
+    't456': '.t456__list_item > a.t-menu__link-item'
+}
+DEFAULT_MENU_LIST_SELECTOR = 'a.t-menu__link-item'
+
+# Fallbacks when the menu list selector finds no links
+ALTERNATIVE_LINK_SELECTORS = ('a.t-menu__link-item', 'a[class*="menu"]', 'li > a')
+
+# Submenu link patterns, tried in order
+SUBMENU_LINK_SELECTORS = ('.t794__list_item a', '.t794__link', 'a[role="menuitem"]', 'li a', 'a')
+
+_TOOLTIP_DIVS = etree.XPath('//div[@data-tooltip-hook]')
+
+# The page header and footer plus every navigation/menu block, which
+# parse_page_content cuts out before looking for content
+_NON_CONTENT_BLOCKS = etree.XPath(
+    "(.//header[@id='t-header'])[1] | (.//footer[@id='t-footer'])[1]"
+    " | .//*[self::nav or self::div]"
+    "[contains(@class, 't228') or contains(@class, 't794') or contains(@class, 't-menu')]"
+)
+
+# Every element that one of the content rules in parse_page_content could
+# accept. Anything inside nav/header/footer is skipped outright.
+_CONTENT_CANDIDATES = etree.XPath(
+    ".//*[not(ancestor::nav or ancestor::header or ancestor::footer)]"
+    "[self::h1 or self::h2 or self::h3 or self::h4 or self::h5 or self::h6 or self::p"
+    " or self::img or self::ul or self::ol"
+    " or contains(@class, 'tn-atom') or contains(@class, 't396__elem')"
+    " or ((self::a or self::button) and contains(@class, 't-btn'))"
+    " or ((self::span or self::div) and (contains(@class, '__title') or contains(@class, '__name')"
+    " or contains(@class, '__content') or contains(@class, '__text') or contains(@class, 't-name')"
+    " or contains(@class, 't-title') or contains(@class, 't-descr') or contains(@class, 't-text')))]"
+)
+
+# Class and tag sets checked by the content rules in parse_page_content
+NAV_CLASSES = frozenset(('t228', 't794', 't-menu'))
+TITLE_CLASSES = frozenset(('t585__title', 't567__title', 't221__title', 't205__title',
+                           't-name', 't-title', '__title', '__name'))
+CONTENT_CLASSES = frozenset(('t585__content', 't585__text', 't567__content', 't567__text',
+                             't221__content', 't221__text', 't205__content', 't205__text',
+                             't-descr', '__content', '__text'))
+TEXT_CLASSES = frozenset(('t-text', 't-title', 't-descr', 't-name'))
+BUTTON_CLASSES = frozenset(('t-btn', 'tn-atom'))
+HEADING_TAGS = frozenset(('h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+TEXT_TAGS = HEADING_TAGS | {'p', 'div', 'span'}
+SKIPPED_BUTTON_TEXTS = frozenset(('call us', 'contact', 'menu', 'home'))
+
+_HAS_HEADING = etree.XPath(
+    'boolean(.//*[self::h1 or self::h2 or self::h3 or self::h4 or self::h5 or self::h6])'
+)
+_HAS_ATOM_DIV = etree.XPath(f"boolean(.//div[{_class_token('tn-atom')}])")
+_INSIDE_ATOM = etree.XPath(
+    f"boolean(ancestor::div[{_class_token('tn-atom')} or contains(@class, 't396__elem')])"
+)
+_WITHIN_MENU = etree.XPath(
+    "boolean(ancestor-or-self::div[contains(@class, 't228') or contains(@class, 't794') or contains(@class, 't-menu')])"
+)
+
+# Tilda exports are UTF-8; without a fixed encoding libxml2 would guess
+# Latin-1 for files that lack a charset meta tag. huge_tree lifts the
+# 10 MB node limit, past which libxml2 silently drops the rest of the page
+# (large inline base64 images hit it).
+_UTF8_PARSER = lxml.html.HTMLParser(encoding='utf-8', huge_tree=True)
+
+def parse_html(markup):
+    """Parse HTML bytes or a string into an lxml document, treating empty input as an empty page."""
+    if isinstance(markup, str):
+        markup = markup.encode('utf-8')
+    try:
+        return lxml.html.document_fromstring(markup, parser=_UTF8_PARSER)
+    except etree.ParserError:
+        return lxml.html.Element('html')
+
+def read_html_file(path):
+    """Parse an HTML file straight from its raw bytes."""
+    with open(path, 'rb') as f:
+        return parse_html(f.read())
+
+def select(element, selector):
+    """Return the elements matching one of the selectors known to this module."""
+    return _SELECTORS[selector](element)
+
+def select_one(element, selector):
+    """Return the first element matching a known selector, or None."""
+    matches = _SELECTORS[selector](element)
+    return matches[0] if matches else None
+
+def get_text(element):
+    """Return the element's text, stripping each text node and joining them without separators."""
+    if element.tag in _STRING_CONTAINERS:
+        texts = _CONTAINER_TEXT_NODES(element, tag=element.tag)
+    else:
+        texts = _TEXT_NODES(element)
+    return ''.join(text.strip() for text in texts)
+
+def get_classes(element):
+    """Return the element's class attribute as a list of class names."""
+    return element.get('class', '').split()
+
+def remove_element(element):
+    """Remove an element and its contents from the tree.
+
+    The tail text that followed it stays in place as its own text node, so
+    the text of the surrounding elements reads the same as before.
+    """
+    parent = element.getparent()
+    if parent is None:
+        return
+    placeholder = etree.Comment()
+    placeholder.tail = element.tail
+    parent.replace(element, placeholder)
 
 def find_html_files(start_path):
     """
@@ -8,61 +195,123 @@ def find_html_files(start_path):
     It prioritizes index.html at the root.
     """
     html_files = []
-    # We walk the directory but explicitly tell walk not to descend into 'files' dirs,
-    # which is where Tilda stores partial body HTMLs.
-    for root, dirs, files in os.walk(start_path):
-        if 'files' in dirs:
-            dirs.remove('files')
-
-        for file in files:
-            if file.lower().endswith('.html'):
-                full_path = os.path.join(root, file)
-                # Give priority to the root index.html
-                if file.lower() == 'index.html' and root == start_path:
-                    html_files.insert(0, full_path)
-                else:
-                    html_files.append(full_path)
+    # Walk the tree depth-first in the same order as os.walk, but don't
+    # descend into 'files' dirs, which is where Tilda stores partial body HTMLs.
+    stack = [start_path]
+    while stack:
+        root = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        # Like os.walk, list symlinked dirs but don't follow them
+                        if entry.name != 'files' and not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    elif entry.name.lower().endswith('.html'):
+                        # Give priority to the root index.html
+                        if entry.name.lower() == 'index.html' and root == start_path:
+                            html_files.insert(0, entry.path)
+                        else:
+                            html_files.append(entry.path)
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
     return html_files
 
-def get_combined_soup(main_file_path):
+def index_tooltips(tree):
+    """Map each '#submenu:' hook to the first submenu container registered for it."""
+    tooltips = {}
+    for div in _TOOLTIP_DIVS(tree):
+        tooltips.setdefault(div.get('data-tooltip-hook'), div)
+    return tooltips
+
+def title_to_slug(title):
+    """Build a menu slug from an item title when there is no link to take it from."""
+    return f"/{title.lower().replace(' ', '-')}"
+
+def looks_like_heading(text):
+    """Short all-caps or title-case text is treated as a heading."""
+    return len(text) < 150 and (text.isupper() or text.istitle())
+
+def get_body_file_path(main_file_path):
+    """Return where the 'body' companion of a page would be, e.g. page123.html -> files/page123body.html"""
+    dir_name = os.path.dirname(main_file_path)
+    file_name = os.path.basename(main_file_path)
+    return os.path.join(dir_name, 'files', file_name.replace('.html', 'body.html'))
+
+def get_file_signature(file_path):
+    """Return the modification time and size of a page file and its body companion.
+
+    Files that are missing are represented by None.
+    """
+    signature = []
+    for path in (file_path, get_body_file_path(file_path)):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append([stat.st_mtime_ns, stat.st_size])
+    return signature
+
+def load_parse_cache(project_path, include_images):
+    """Load the cached per-file parse results, or an empty cache if it doesn't apply."""
+    try:
+        cache = json_utils.load_file(os.path.join(project_path, PARSE_CACHE_FILE))
+    except (OSError, ValueError):
+        return {}
+    if (not isinstance(cache, dict) or cache.get('version') != PARSE_CACHE_VERSION or
+            cache.get('include_images') != include_images):
+        return {}
+    return cache.get('files', {})
+
+def save_parse_cache(project_path, include_images, files):
+    """Store per-file parse results for the next run, ignoring write failures."""
+    cache = {'version': PARSE_CACHE_VERSION, 'include_images': include_images, 'files': files}
+    try:
+        json_utils.dump_file(cache, os.path.join(project_path, PARSE_CACHE_FILE))
+    except OSError as e:
+        print(f"Could not save parse cache: {e}")
+
+def get_combined_tree(main_file_path):
     """
     Loads the main HTML file and combines it with its corresponding 'body' file if it exists.
     Tilda often splits the head/header and the body content into separate files.
     """
-    with open(main_file_path, 'r', encoding='utf-8') as f:
-        main_soup = BeautifulSoup(f.read(), 'lxml')
+    main_tree = read_html_file(main_file_path)
 
-    # Construct the potential path for the body file
-    # e.g., page123.html -> files/page123body.html
-    dir_name = os.path.dirname(main_file_path)
-    file_name = os.path.basename(main_file_path)
-    body_file_name = file_name.replace('.html', 'body.html')
-    body_file_path = os.path.join(dir_name, 'files', body_file_name)
+    try:
+        body_tree = read_html_file(get_body_file_path(main_file_path))
+    except FileNotFoundError:
+        body_tree = None
 
-    if os.path.exists(body_file_path):
-        with open(body_file_path, 'r', encoding='utf-8') as f:
-            body_soup = BeautifulSoup(f.read(), 'lxml')
+    if body_tree is not None:
 
         # The main content of the page is usually within a div with id="allrecords"
-        main_content_container = main_soup.find('div', id='allrecords')
-        body_content = body_soup.find('div', id='allrecords')
+        main_content_container = main_tree.find(".//div[@id='allrecords']")
+        body_content = body_tree.find(".//div[@id='allrecords']")
 
-        if main_content_container and body_content:
-            # Replace the container's content with the content from the body file
-            main_content_container.clear()
-            for child in body_content.find_all(recursive=False):
-                main_content_container.append(child)
+        if main_content_container is not None and body_content is not None:
+            # Replace the container's content with the elements from the body file
+            main_content_container.text = None
+            for child in list(main_content_container):
+                main_content_container.remove(child)
+            for child in list(body_content):
+                if isinstance(child.tag, str):
+                    child.tail = None
+                    main_content_container.append(child)
 
-    return main_soup
+    return main_tree
 
 
-def get_page_slug(filepath, soup):
+def get_page_slug(filepath, tree):
     """Determine the page slug from the file or a meta tag."""
     # Try to get slug from <meta property="og:url">
-    og_url_tag = soup.find('meta', property='og:url')
-    if og_url_tag and og_url_tag.get('content'):
+    og_url_tag = tree.find(".//meta[@property='og:url']")
+    if og_url_tag is not None and og_url_tag.get('content'):
         # Extract full path from URL, preserving hierarchical structure
-        full_url = og_url_tag['content'].strip()
+        full_url = og_url_tag.get('content').strip()
         
         # Parse the URL to get just the path component
         from urllib.parse import urlparse
@@ -89,9 +338,9 @@ def get_page_slug(filepath, soup):
         return '/'
     return f"/{slug}"
 
-def parse_menu(soup, debug=False):
+def parse_menu(tree, debug=False):
     """
-    Extracts the main menu and submenus from the Tilda page soup.
+    Extracts the main menu and submenus from the parsed Tilda page.
     Supports multiple Tilda menu structures (T228, T456, etc.).
     """
     menu = []
@@ -99,73 +348,52 @@ def parse_menu(soup, debug=False):
     if debug:
         print("🔍 Starting menu parsing...")
     
-    # Try different navigation patterns used by Tilda
-    navigation_selectors = [
-        # T228 pattern (original)
-        'nav.t228__centercontainer',
-        # T456 pattern  
-        'nav.t456__rightwrapper',
-        # Generic patterns as fallbacks
-        'nav.t-menu',
-        'div.t-menu',
-        # Look for any nav with menu classes
-        'nav[class*="menu"]',
-        'div[class*="menu"]'
-    ]
-    
     main_nav = None
     menu_list_selector = None
     
     # Find the navigation container
-    for selector in navigation_selectors:
-        main_nav = soup.select_one(selector)
-        if main_nav:
+    for selector in NAVIGATION_SELECTORS:
+        main_nav = select_one(tree, selector)
+        if main_nav is not None:
+            nav_classes = get_classes(main_nav)
             if debug:
                 print(f"✅ Found navigation with selector: {selector}")
-                print(f"   Classes: {main_nav.get('class', [])}")
+                print(f"   Classes: {nav_classes}")
             
             # Determine the appropriate list item selector based on found nav
-            if 't228' in main_nav.get('class', []):
-                menu_list_selector = '.t228__list_item > a.t-menu__link-item'
-            elif 't456' in main_nav.get('class', []):
-                menu_list_selector = '.t456__list_item > a.t-menu__link-item'
-            else:
-                # Generic fallback
-                menu_list_selector = 'a.t-menu__link-item'
+            menu_list_selector = next(
+                (MENU_LIST_SELECTORS[cls] for cls in MENU_LIST_SELECTORS if cls in nav_classes),
+                DEFAULT_MENU_LIST_SELECTOR
+            )
             
             if debug:
                 print(f"   Using menu list selector: {menu_list_selector}")
             break
     
-    if not main_nav:
+    if main_nav is None:
         # Final fallback: look for any ul with menu-related classes
-        main_nav = soup.select_one('ul.t-menu__list, ul[class*="menu"], ul[class*="list"]')
-        if main_nav:
-            menu_list_selector = 'a.t-menu__link-item'
+        main_nav = select_one(tree, 'ul.t-menu__list, ul[class*="menu"], ul[class*="list"]')
+        if main_nav is not None:
+            menu_list_selector = DEFAULT_MENU_LIST_SELECTOR
             if debug:
                 print(f"✅ Found navigation with fallback UL selector")
-                print(f"   Classes: {main_nav.get('class', [])}")
+                print(f"   Classes: {get_classes(main_nav)}")
     
-    if not main_nav:
+    if main_nav is None:
         if debug:
             print("❌ No navigation container found")
         return []
 
     # Find all top-level menu items
-    main_menu_links = main_nav.select(menu_list_selector)
+    main_menu_links = select(main_nav, menu_list_selector)
     
     if debug:
         print(f"🔗 Found {len(main_menu_links)} menu links with selector: {menu_list_selector}")
     
     # If no links found, try alternative selectors
     if not main_menu_links:
-        alternative_selectors = [
-            'a.t-menu__link-item',
-            'a[class*="menu"]',
-            'li > a'
-        ]
-        for alt_selector in alternative_selectors:
-            main_menu_links = main_nav.select(alt_selector)
+        for alt_selector in ALTERNATIVE_LINK_SELECTORS:
+            main_menu_links = select(main_nav, alt_selector)
             if main_menu_links:
                 if debug:
                     print(f"✅ Found {len(main_menu_links)} links with alternative selector: {alt_selector}")
@@ -174,13 +402,16 @@ def parse_menu(soup, debug=False):
     if debug and not main_menu_links:
         print("❌ No menu links found with any selector")
         # Show available links for debugging
-        all_links = main_nav.find_all('a')
+        all_links = select(main_nav, 'a')
         print(f"   Available links in nav: {len(all_links)}")
         for i, link in enumerate(all_links[:5]):  # Show first 5
-            print(f"   {i+1}. {link.get_text(strip=True)} -> {link.get('href', '')}")
+            print(f"   {i+1}. {get_text(link)} -> {link.get('href', '')}")
+
+    # Submenu containers are looked up by hook, so index them in one pass
+    tooltips = index_tooltips(tree)
 
     for i, link in enumerate(main_menu_links):
-        title = link.get_text(strip=True)
+        title = get_text(link)
         href = link.get('href', '')
         
         if debug:
@@ -201,44 +432,36 @@ def parse_menu(soup, debug=False):
             
             # Handle both "#submenu:HVAC" and "#submenu: HVAC" (with space)
             submenu_hook = href.strip()
-            submenu_container = soup.find('div', {'data-tooltip-hook': submenu_hook})
+            submenu_container = tooltips.get(submenu_hook)
             
             # If exact match fails, try with/without spaces
-            if not submenu_container:
+            if submenu_container is None:
                 # Try without space after colon
                 normalized_hook = href.replace('#submenu: ', '#submenu:')
-                submenu_container = soup.find('div', {'data-tooltip-hook': normalized_hook})
-                if debug and submenu_container:
+                submenu_container = tooltips.get(normalized_hook)
+                if debug and submenu_container is not None:
                     print(f"   ✅ Found submenu with normalized hook (no space): {normalized_hook}")
             
-            if not submenu_container:
+            if submenu_container is None:
                 # Try with space after colon  
                 normalized_hook = href.replace('#submenu:', '#submenu: ')
-                submenu_container = soup.find('div', {'data-tooltip-hook': normalized_hook})
-                if debug and submenu_container:
+                submenu_container = tooltips.get(normalized_hook)
+                if debug and submenu_container is not None:
                     print(f"   ✅ Found submenu with normalized hook (with space): {normalized_hook}")
             
-            if submenu_container:
+            if submenu_container is not None:
                 submenu_list = []
                 # Look for submenu links with multiple possible selectors
-                submenu_selectors = [
-                    '.t794__list_item a',
-                    '.t794__link',
-                    'a[role="menuitem"]',
-                    'li a',
-                    'a'
-                ]
-                
                 submenu_links = []
-                for sub_selector in submenu_selectors:
-                    submenu_links = submenu_container.select(sub_selector)
+                for sub_selector in SUBMENU_LINK_SELECTORS:
+                    submenu_links = select(submenu_container, sub_selector)
                     if submenu_links:
                         if debug:
                             print(f"   📎 Found {len(submenu_links)} submenu links with: {sub_selector}")
                         break
                 
                 for j, sub_link in enumerate(submenu_links):
-                    sub_title = sub_link.get_text(strip=True)
+                    sub_title = get_text(sub_link)
                     sub_href = sub_link.get('href', '')
                     
                     if debug:
@@ -266,7 +489,7 @@ def parse_menu(soup, debug=False):
                         menu_item['slug'] = '/'.join(parent_parts) if len(parent_parts) > 1 else '/'
                     else:
                         # Use the title as the slug
-                        menu_item['slug'] = f"/{title.lower().replace(' ', '-')}"
+                        menu_item['slug'] = title_to_slug(title)
                     
                     menu_item['submenu'] = submenu_list
                     
@@ -274,12 +497,12 @@ def parse_menu(soup, debug=False):
                         print(f"   ✅ Created submenu with {len(submenu_list)} items, parent slug: {menu_item['slug']}")
                 else:
                     # A dropdown menu without content
-                    menu_item['slug'] = f"/{title.lower().replace(' ', '-')}"
+                    menu_item['slug'] = title_to_slug(title)
                     if debug:
                         print(f"   ⚠️ Submenu container found but no links extracted")
             else:
                 # Submenu hook found but no container - create a placeholder
-                menu_item['slug'] = f"/{title.lower().replace(' ', '-')}"
+                menu_item['slug'] = title_to_slug(title)
                 if debug:
                     print(f"   ❌ Submenu hook found but no container: {href}")
                 
@@ -295,7 +518,7 @@ def parse_menu(soup, debug=False):
                 menu_item['slug'] = href
             else:
                 # Default case: create slug from title
-                menu_item['slug'] = f"/{title.lower().replace(' ', '-')}"
+                menu_item['slug'] = title_to_slug(title)
             
             if debug:
                 print(f"   🔗 Direct link, slug: {menu_item['slug']}")
@@ -311,227 +534,183 @@ def parse_menu(soup, debug=False):
 
     return menu
 
-def parse_page_content(soup, include_images=True):
-    """Extract structured content from a BeautifulSoup object, focusing on Tilda-specific elements while maintaining document order."""
+def parse_page_content(tree, include_images=True):
+    """Extract structured content from a parsed page, focusing on Tilda-specific elements while maintaining document order."""
     content = []
     
     # Find the main content container, which in Tilda is usually #allrecords
-    main_content = soup.find('div', id='allrecords')
+    main_content = tree.find(".//div[@id='allrecords']")
     
-    if not main_content:
+    if main_content is None:
         # Fallback to body if #allrecords is not found
-        main_content = soup.body
-        if not main_content:
+        main_content = tree.find('.//body')
+        if main_content is None:
             return []
 
-    # To avoid parsing navigation as content, we decompose (remove) the header and footer.
-    header = main_content.find('header', id='t-header')
-    if header:
-        header.decompose()
-        
-    footer = main_content.find('footer', id='t-footer')
-    if footer:
-        footer.decompose()
+    # To avoid parsing navigation as content, remove the header, the footer
+    # and all navigation and menu elements
+    for block in _NON_CONTENT_BLOCKS(main_content):
+        remove_element(block)
 
-    # Remove navigation and menu elements
-    for nav in main_content.find_all(['nav', 'div'], class_=lambda x: x and any(menu_class in x for menu_class in ['t228', 't794', 't-menu'])):
-        nav.decompose()
+    # Menu blocks inside the content area were removed above, so a list can
+    # only sit in a menu if the content area itself does
+    lists_in_menu = _WITHIN_MENU(main_content)
 
     # Track processed content to avoid duplicates
     processed_texts = set()
-    processed_elements = set()
 
-    # Collect all potential content elements with their position information
-    content_candidates = []
+    # Only elements that one of the rules below could accept are visited,
+    # in document order, and none of them sit inside nav/header/footer
+    for element in _CONTENT_CANDIDATES(main_content):
+        class_attr = element.get('class', '')
+        element_classes = frozenset(class_attr.split())
 
-    # Get all elements that could contain content, preserving document order
-    all_elements = main_content.find_all(True, recursive=True)
-    
-    for element in all_elements:
-        # Skip if we've already processed this element or if it's in navigation
-        if (id(element) in processed_elements or
-            element.find_parent(['nav', 'header', 'footer']) or
-            any(nav_class in element.get('class', []) for nav_class in ['t228', 't794', 't-menu'])):
+        # Skip navigation blocks
+        if not NAV_CLASSES.isdisjoint(element_classes):
             continue
 
         element_info = None
-        element_classes = element.get('class', [])
+        tag = element.tag
         
         # PRIORITY 1: tn-atom elements (Tilda's main text containers)
         if 'tn-atom' in element_classes:
+            text_content = get_text(element)
+
             # Skip empty atoms or those containing only images
-            if element.find('img') and not element.get_text(strip=True):
+            if not text_content and element.find('.//img') is not None:
                 continue
                 
-            text_content = element.get_text(strip=True)
             if text_content and len(text_content) > 3 and text_content not in processed_texts:
                 # Check if this looks like a heading
-                is_heading = (len(text_content) < 150 and 
-                            (text_content.isupper() or 
-                             text_content.istitle() or 
-                             element.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']) or
-                             'font-weight:700' in element.get('style', '') or
-                             'font-weight:600' in element.get('style', '')))
+                style = element.get('style', '')
+                is_heading = (looks_like_heading(text_content) or
+                              (len(text_content) < 150 and
+                               (_HAS_HEADING(element) or
+                                'font-weight:700' in style or
+                                'font-weight:600' in style)))
                 
                 element_info = {
                     "type": "heading" if is_heading else "paragraph",
-                    "text": text_content,
-                    "priority": 1
+                    "text": text_content
                 }
 
         # PRIORITY 2: FAQ titles (spans with specific classes)
-        elif (element.name == 'span' and 
-              any(title_class in element_classes for title_class in 
-                  ['t585__title', 't567__title', 't221__title', 't205__title', 't-name', 't-title', '__title', '__name'])):
-            text_content = element.get_text(strip=True)
+        elif tag == 'span' and not TITLE_CLASSES.isdisjoint(element_classes):
+            text_content = get_text(element)
             if text_content and len(text_content) > 3 and text_content not in processed_texts:
                 element_info = {
                     "type": "heading",
-                    "text": text_content,
-                    "priority": 2
+                    "text": text_content
                 }
 
         # PRIORITY 3: FAQ content and other structured content
-        elif (element.name in ['div', 'span', 'p'] and
-              any(content_class in element_classes for content_class in 
-                  ['t585__content', 't585__text', 't567__content', 't567__text',
-                   't221__content', 't221__text', 't205__content', 't205__text',
-                   't-descr', '__content', '__text'])):
-            text_content = element.get_text(strip=True)
+        elif tag in ('div', 'span', 'p') and not CONTENT_CLASSES.isdisjoint(element_classes):
+            text_content = get_text(element)
             if text_content and len(text_content) > 3 and text_content not in processed_texts:
                 element_info = {
                     "type": "paragraph",
-                    "text": text_content,
-                    "priority": 3
+                    "text": text_content
                 }
 
         # PRIORITY 4: t396 elements with text content
-        elif (any('t396__elem' in cls for cls in element_classes) and 
+        elif ('t396__elem' in class_attr and  # also matches modifiers like t396__elem-flex
               element.get('data-elem-type') == 'text' and
-              not element.find('div', class_='tn-atom')):  # Don't double-process tn-atom parents
-            text_content = element.get_text(strip=True)
+              not _HAS_ATOM_DIV(element)):  # Don't double-process tn-atom parents
+            text_content = get_text(element)
             if text_content and len(text_content) > 3 and text_content not in processed_texts:
-                is_heading = (len(text_content) < 150 and 
-                            (text_content.isupper() or text_content.istitle()))
+                is_heading = looks_like_heading(text_content)
                 element_info = {
                     "type": "heading" if is_heading else "paragraph",
-                    "text": text_content,
-                    "priority": 4
+                    "text": text_content
                 }
 
         # PRIORITY 5: Traditional Tilda block content
-        elif (element.name in ['p', 'div', 'span', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'] and
-              any(text_class in element_classes for text_class in ['t-text', 't-title', 't-descr', 't-name'])):
-            text_content = element.get_text(strip=True)
+        elif tag in TEXT_TAGS and not TEXT_CLASSES.isdisjoint(element_classes):
+            text_content = get_text(element)
             if text_content and len(text_content) > 3 and text_content not in processed_texts:
-                is_heading = (element.name.startswith('h') or 
+                is_heading = (tag.startswith('h') or 
                             't-title' in element_classes or
                             't-name' in element_classes)
                 element_info = {
                     "type": "heading" if is_heading else "paragraph",
-                    "text": text_content,
-                    "priority": 5
+                    "text": text_content
                 }
 
         # PRIORITY 6: Standard HTML headings and paragraphs
-        elif (element.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p'] and
-              not element.find_parent('div', class_='tn-atom') and
-              not element.find_parent('div', class_=lambda x: x and 't396__elem' in x)):
-            text_content = element.get_text(strip=True)
+        elif (tag in HEADING_TAGS or tag == 'p') and not _INSIDE_ATOM(element):
+            text_content = get_text(element)
             if text_content and len(text_content) > 3 and text_content not in processed_texts:
                 element_info = {
-                    "type": "heading" if element.name.startswith('h') else "paragraph",
-                    "text": text_content,
-                    "priority": 6
+                    "type": "heading" if tag.startswith('h') else "paragraph",
+                    "text": text_content
                 }
 
         # PRIORITY 7: Buttons and important links
-        elif (element.name in ['a', 'button'] and
-              any(btn_class in element_classes for btn_class in ['t-btn', 'tn-atom']) and
-              not element.find_parent(['nav', 'header', 'footer'])):
-            button_text = element.get_text(strip=True)
+        elif tag in ('a', 'button') and not BUTTON_CLASSES.isdisjoint(element_classes):
+            button_text = get_text(element)
             if (button_text and len(button_text) > 2 and len(button_text) < 50 and 
                 button_text not in processed_texts and
-                not button_text.lower() in ['call us', 'contact', 'menu', 'home']):
+                button_text.lower() not in SKIPPED_BUTTON_TEXTS):
                 element_info = {
                     "type": "button",
                     "text": button_text,
-                    "href": element.get('href', ''),
-                    "priority": 7
+                    "href": element.get('href', '')
                 }
 
         # PRIORITY 8: Images (only if include_images is True)
-        elif element.name == 'img' and include_images:
+        elif tag == 'img' and include_images:
             src = element.get('src') or element.get('data-original')
             alt = element.get('alt', '')
             if src and not src.startswith('data:'):  # Exclude base64 embedded images
                 element_info = {
                     "type": "image",
                     "src": src,
-                    "alt": alt,
-                    "priority": 8
+                    "alt": alt
                 }
 
         # PRIORITY 9: Lists
-        elif (element.name in ['ul', 'ol'] and
-              not element.find_parent('div', class_=lambda x: x and any(nav_class in x for nav_class in ['t228', 't794', 't-menu']))):
+        elif tag in ('ul', 'ol') and not lists_in_menu:
             items = []
-            for li in element.find_all('li'):
-                li_text = li.get_text(strip=True)
+            for li in element.iterdescendants('li'):
+                li_text = get_text(li)
                 if li_text and li_text not in processed_texts:
                     items.append(li_text)
             
             if items and len(items) > 1:  # Only include lists with multiple items
                 element_info = {
                     "type": "list",
-                    "items": items,
-                    "priority": 9
+                    "items": items
                 }
                 # Mark all list item texts as processed
                 for item in items:
                     processed_texts.add(item)
 
-        # If we found content, add it to candidates with position info
+        # Candidates are visited in document order, so found content goes
+        # straight into the result
         if element_info:
-            # Calculate the element's position in the document for sorting
-            position = 0
-            current = element
-            while current.previous_sibling:
-                current = current.previous_sibling
-                position += 1
-            
-            # Add parent positions for more accurate sorting
-            parent_positions = []
-            parent = element.parent
-            while parent and parent != main_content:
-                parent_position = 0
-                current = parent
-                while current.previous_sibling:
-                    current = current.previous_sibling
-                    parent_position += 1
-                parent_positions.append(parent_position)
-                parent = parent.parent
-            
-            element_info['position'] = (tuple(reversed(parent_positions)), position)
-            element_info['element'] = element
-            content_candidates.append(element_info)
+            content.append(element_info)
             
             # Mark text as processed
             if 'text' in element_info:
                 processed_texts.add(element_info['text'])
-            
-            # Mark element as processed
-            processed_elements.add(id(element))
 
-    # Sort candidates by position to maintain document order
-    content_candidates.sort(key=lambda x: x['position'])
+    return content
 
-    # Convert candidates to final content, removing position metadata
-    for candidate in content_candidates:
-        final_item = {k: v for k, v in candidate.items() if k not in ['position', 'element', 'priority']}
-        content.append(final_item)
+def parse_page_file(file_path, include_images=True, tree=None):
+    """Parse one exported HTML file into a page dict with title, slug and content.
 
-    return content
+    An already combined tree for the file may be passed in to skip loading it
+    again. Content parsing strips navigation from the tree as it goes.
+    """
+    if tree is None:
+        tree = get_combined_tree(file_path)
+    
+    title = tree.find('.//title')
+    return {
+        "title": title.text.strip() if title is not None and title.text else "Untitled",
+        "slug": get_page_slug(file_path, tree),
+        "content": parse_page_content(tree, include_images)
+    }
 
 def parse_tilda_export(project_path, include_images=True, debug=False):
     """
@@ -552,38 +731,60 @@ def parse_tilda_export(project_path, include_images=True, debug=False):
         print(f"🚀 Starting Tilda export parsing...")
         print(f"   Found {len(html_files)} HTML files")
     
+    # Results from the previous run are reused for files that haven't changed.
+    # Debug runs parse everything so the menu trace is complete.
+    cached_files = {} if debug else load_parse_cache(project_path, include_images)
+    cache_keys = [os.path.relpath(file_path, extracted_dir) for file_path in html_files]
+    signatures = [get_file_signature(file_path) for file_path in html_files]
+    pages = [None] * len(html_files)
+    for i, (key, signature) in enumerate(zip(cache_keys, signatures)):
+        entry = cached_files.get(key)
+        if entry and entry.get('signature') == signature:
+            pages[i] = entry['page']
+
     # First, parse the main page (index.html) to find the menu, since it's shared.
-    if html_files:
+    main_entry = cached_files.get(cache_keys[0])
+    if pages[0] is not None and 'menu' in main_entry:
+        structured_data['menu'] = main_entry['menu']
+    else:
         if debug:
             print(f"📋 Parsing menu from: {html_files[0]}")
         
-        # Get the combined soup to ensure the header is properly loaded
-        combined_soup_for_menu = get_combined_soup(html_files[0])
-        structured_data['menu'] = parse_menu(combined_soup_for_menu, debug=debug)
-
-    # Then, parse all pages for content
-    for i, file_path in enumerate(html_files):
+        # Get the combined tree to ensure the header is properly loaded
+        main_tree = get_combined_tree(html_files[0])
+        structured_data['menu'] = parse_menu(main_tree, debug=debug)
+        # parse_menu only reads the tree, so the same parse serves the main page's content
+        pages[0] = parse_page_file(html_files[0], include_images, tree=main_tree)
+        # Free the document now rather than holding it through the whole page loop
+        del main_tree
+
+    # Then, parse the remaining pages for content. Files are independent, so
+    # large exports are spread over worker processes; results keep file order.
+    stale = [i for i, page in enumerate(pages) if page is None]
+    stale_files = [html_files[i] for i in stale]
+    if len(stale_files) >= PARALLEL_PARSE_MIN_FILES and (os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(mp_context=multiprocessing.get_context(PARSE_START_METHOD)) as executor:
+            parsed = executor.map(parse_page_file, stale_files, repeat(include_images), chunksize=4)
+            for i, page in zip(stale, parsed):
+                pages[i] = page
+    else:
+        for i, file_path in zip(stale, stale_files):
+            pages[i] = parse_page_file(file_path, include_images)
+
+    cache_files = {key: {'signature': signature, 'page': page}
+                   for key, signature, page in zip(cache_keys, signatures, pages)}
+    cache_files[cache_keys[0]]['menu'] = structured_data['menu']
+    save_parse_cache(project_path, include_images, cache_files)
+
+    for i, (file_path, page) in enumerate(zip(html_files, pages)):
         if debug:
             print(f"\n📄 Parsing page {i+1}/{len(html_files)}: {os.path.basename(file_path)}")
+            print(f"   Title: {page['title']}")
+            print(f"   Slug: {page['slug']}")
+            print(f"   Content blocks: {len(page['content'])}")
         
-        # Get the full, combined soup for the page
-        soup = get_combined_soup(file_path)
-        
-        page_title = soup.title.string.strip() if soup.title else "Untitled"
-        page_slug = get_page_slug(file_path, soup)
-        page_content = parse_page_content(soup, include_images)
-        
-        if debug:
-            print(f"   Title: {page_title}")
-            print(f"   Slug: {page_slug}")
-            print(f"   Content blocks: {len(page_content)}")
-        
-        if page_content:
-            structured_data["pages"].append({
-                "title": page_title,
-                "slug": page_slug,
-                "content": page_content
-            })
+        if page['content']:
+            structured_data["pages"].append(page)
 
     if debug:
         total_pages = len(structured_data["pages"])
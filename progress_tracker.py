@@ -1,8 +1,67 @@
-import json
 import os
 import time
+from collections import deque
 from datetime import datetime
-from threading import Lock
+from itertools import islice
+from threading import Lock, Timer
+import json_utils
+
+# Number of recent log lines kept in memory for live progress streaming
+LOG_BUFFER_SIZE = 500
+
+# Seconds to collect status changes and log lines before writing them out.
+# Live progress is served from memory, so the files only need to catch up.
+STATUS_FLUSH_INTERVAL = 0.25
+
+# Buffer size of the open log file
+LOG_WRITE_BUFFER = 64 * 1024
+
+# Block size used when reading a log file backwards for its last lines
+LOG_TAIL_BLOCK = 8 * 1024
+
+# Most recent page errors and warnings kept in the status; the page
+# counters keep the totals
+MAX_STATUS_ENTRIES = 500
+
+# Parsed status files by path, reused while their mtime and size are unchanged
+_history_cache = {}
+
+_clock_cache = (None, '')  # (epoch second, formatted time) of the last log line
+
+def read_last_lines(path, limit):
+    """Return the last limit lines of a text file, keeping line endings.
+
+    The file is read backwards in blocks until enough lines are found, so
+    the cost depends on limit rather than on the size of the file.
+    """
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b''
+        while pos > 0 and data.count(b'\n') <= limit:
+            step = min(LOG_TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    # Translate line endings the way text mode reads them
+    text = data.decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+    parts = text.split('\n')
+    lines = [part + '\n' for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    if pos > 0:
+        # The first line was cut off by the block boundary
+        lines = lines[1:]
+    return lines[-limit:]
+
+def _log_clock():
+    """Return the current time as HH:MM:SS, formatting it at most once per second."""
+    global _clock_cache
+    now = int(time.time())
+    second, text = _clock_cache
+    if now != second:
+        text = time.strftime("%H:%M:%S", time.localtime(now))
+        _clock_cache = (now, text)
+    return text
 
 class ProgressTracker:
     """Tracks migration progress and logs operations for real-time updates."""
@@ -18,6 +77,12 @@ class ProgressTracker:
         self.status_file = os.path.join(self.logs_dir, f"{self.migration_id}_status.json")
         
         self.lock = Lock()
+        self._write_lock = Lock()  # Keeps status file writes in snapshot order
+        self._status_dirty = True  # Nothing written yet
+        self._flush_timer = None
+        self._log_fp = None  # Opened on the first log line
+        self.log_buffer = deque(maxlen=LOG_BUFFER_SIZE)
+        self.log_seq = 0  # Total number of lines ever logged
         self.status = {
             'migration_id': self.migration_id,
             'started_at': datetime.now().isoformat(),
@@ -27,14 +92,15 @@ class ProgressTracker:
             'processed_pages': 0,
             'successful_pages': 0,
             'failed_pages': 0,
+            'skipped_pages': 0,
             'current_operation': '',
             'percentage': 0,
-            'errors': [],
-            'warnings': []
+            'errors': deque(maxlen=MAX_STATUS_ENTRIES),
+            'warnings': deque(maxlen=MAX_STATUS_ENTRIES)
         }
         
-        self._save_status()
         self._log_message("Migration initialized", "INFO")
+        self.flush()
     
     def start_migration(self, total_pages):
         """Start the migration process."""
@@ -90,6 +156,7 @@ class ProgressTracker:
         """Log skipped page (e.g., already exists)."""
         with self.lock:
             self.status['processed_pages'] += 1
+            self.status['skipped_pages'] += 1
             self.status['percentage'] = int((self.status['processed_pages'] / self.status['total_pages']) * 100)
             self.status['current_operation'] = f"⚠ Skipped page: {page_title}"
             
@@ -123,64 +190,163 @@ class ProgressTracker:
                 message = "❌ Migration failed"
             
             self._log_message(message, "INFO", "migration_complete")
+        
+        # The final status and log are written right away rather than on the timer
+        self.flush()
+        self._close_log_file()
     
     def get_status(self):
         """Get current migration status."""
         with self.lock:
-            return self.status.copy()
+            return self._status_snapshot()
     
     def get_recent_logs(self, limit=50):
         """Get recent log entries."""
+        with self.lock:
+            if limit <= len(self.log_buffer) or self.log_seq == len(self.log_buffer):
+                return list(self.log_buffer)[-limit:]
+        
+        # Older lines have left the in-memory buffer, read them from file
+        self.flush()
         try:
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                return lines[-limit:] if len(lines) > limit else lines
+            return read_last_lines(self.log_file, limit)
         except FileNotFoundError:
             return []
     
+    def get_logs_since(self, seq):
+        """Get log entries written after the given sequence number.
+
+        Returns a tuple of (new_logs, latest_seq). Only the tail of the
+        in-memory buffer is visited, so the cost depends on the number of
+        new entries rather than the length of the whole log. A sequence
+        number ahead of this tracker (e.g. one carried over from a previous
+        migration) is treated as a reset and yields the whole buffer.
+        """
+        with self.lock:
+            latest_seq = self.log_seq
+            if seq > latest_seq:
+                seq = 0
+            count = min(latest_seq - seq, len(self.log_buffer))
+            new_logs = list(islice(reversed(self.log_buffer), count))
+        new_logs.reverse()
+        return new_logs, latest_seq
+    
+    def flush(self):
+        """Write buffered log lines, and the current status if it has changed, to file now."""
+        with self._write_lock:
+            with self.lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if self._log_fp is not None:
+                    try:
+                        self._log_fp.flush()
+                    except Exception as e:
+                        print(f"Logging error: {e}")
+                if not self._status_dirty:
+                    return
+                self._status_dirty = False
+                snapshot = self._status_snapshot()
+            try:
+                json_utils.dump_file(snapshot, self.status_file)
+            except Exception as e:
+                # Fallback logging if status file can't be written
+                print(f"Error saving status: {e}")
+    
+    def _status_snapshot(self):
+        """Copy the status into plain JSON-ready data. Must be called with the lock held."""
+        # The entry buffers are copied too, other threads keep appending to them
+        return dict(self.status,
+                    errors=list(self.status['errors']),
+                    warnings=list(self.status['warnings']))
+    
     def _save_status(self):
-        """Save current status to file."""
-        try:
-            with open(self.status_file, 'w', encoding='utf-8') as f:
-                json.dump(self.status, f, indent=2)
-        except Exception as e:
-            # Fallback logging if status file can't be written
-            print(f"Error saving status: {e}")
+        """Mark the status as changed and schedule a write to file.
+
+        Must be called with the lock held. Changes arriving within
+        STATUS_FLUSH_INTERVAL are written together.
+        """
+        self._status_dirty = True
+        self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """Start the flush timer unless one is already pending. Must be called with the lock held."""
+        if self._flush_timer is None:
+            self._flush_timer = Timer(STATUS_FLUSH_INTERVAL, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def _close_log_file(self):
+        """Close the log file; a later log line opens it again."""
+        with self.lock:
+            if self._log_fp is not None:
+                try:
+                    self._log_fp.close()
+                except Exception as e:
+                    print(f"Logging error: {e}")
+                self._log_fp = None
     
     def _log_message(self, message, level="INFO", operation_type="general"):
-        """Write a message to the log file."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {level:7} | {message}\n"
+        """Append a message to the log buffer and the log file.
+
+        The file is kept open and written through a buffer that the flush
+        timer empties.
+        """
+        log_entry = f"[{_log_clock()}] {level:7} | {message}\n"
+        self.log_buffer.append(log_entry)
+        self.log_seq += 1
         
         try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
+            if self._log_fp is None:
+                self._log_fp = open(self.log_file, 'a', encoding='utf-8', buffering=LOG_WRITE_BUFFER)
+            self._log_fp.write(log_entry)
         except Exception as e:
             # Fallback to console if file logging fails
             print(f"Logging error: {e}")
             print(log_entry.strip())
+            return
+        self._schedule_flush()
     
     @classmethod
     def get_migration_history(cls, project_path):
         """Get list of all previous migrations for a project."""
         logs_dir = os.path.join(project_path, 'migration_logs')
-        if not os.path.exists(logs_dir):
+        try:
+            with os.scandir(logs_dir) as entries:
+                status_entries = [entry for entry in entries if entry.name.endswith('_status.json')]
+        except (FileNotFoundError, NotADirectoryError):
+            cls.forget_migration_history(project_path)
             return []
         
         migrations = []
-        for filename in os.listdir(logs_dir):
-            if filename.endswith('_status.json'):
-                try:
-                    with open(os.path.join(logs_dir, filename), 'r', encoding='utf-8') as f:
-                        status = json.load(f)
-                        migrations.append(status)
-                except Exception:
-                    continue
+        for entry in status_entries:
+            try:
+                stat = entry.stat()
+                signature = (stat.st_mtime_ns, stat.st_size)
+                cached = _history_cache.get(entry.path)
+                if cached is None or cached[0] != signature:
+                    cached = (signature, json_utils.load_file(entry.path))
+                    _history_cache[entry.path] = cached
+            except Exception:
+                continue
+            # Copy so callers can annotate entries without touching the cache
+            migrations.append(dict(cached[1]))
+        
+        # Forget status files that have been deleted from this project
+        cls.forget_migration_history(project_path, keep={entry.path for entry in status_entries})
         
         # Sort by started_at timestamp, newest first
         migrations.sort(key=lambda x: x.get('started_at', ''), reverse=True)
         return migrations
     
+    @classmethod
+    def forget_migration_history(cls, project_path, keep=()):
+        """Drop a project's cached status files, except the paths in keep."""
+        logs_dir = os.path.join(project_path, 'migration_logs')
+        for path in [path for path in list(_history_cache)
+                     if os.path.dirname(path) == logs_dir and path not in keep]:
+            _history_cache.pop(path, None)
+    
     @classmethod
     def get_migration_log(cls, project_path, migration_id):
         """Get the full log for a specific migration."""
@@ -189,4 +355,13 @@ class ProgressTracker:
             with open(log_file, 'r', encoding='utf-8') as f:
                 return f.read()
         except FileNotFoundError:
-            return "Log file not found." 
\ No newline at end of file
+            return "Log file not found."
+    
+    @classmethod
+    def get_migration_log_tail(cls, project_path, migration_id, limit=20):
+        """Get the last lines of the log for a specific migration."""
+        log_file = os.path.join(project_path, 'migration_logs', f"{migration_id}.log")
+        try:
+            return ''.join(read_last_lines(log_file, limit))
+        except FileNotFoundError:
+            return "Log file not found."
@@ -1,8 +1,68 @@
 import requests
-import json
 import base64
-from urllib.parse import urljoin
+import html
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
+from concurrent.futures import ThreadPoolExecutor
+import json_utils
+
+# Connections kept open per host; sized above the page migration thread pool
+HTTP_POOL_SIZE = 16
+
+# HTTP methods _make_request supports, and whether each one sends the JSON body
+REQUEST_METHODS = {'GET': False, 'POST': True, 'PUT': True, 'DELETE': False, 'OPTIONS': False}
+
+# Upper bound on result pages of a listing fetched at the same time
+PAGINATION_WORKERS = 8
+
+# Most requests WordPress accepts in one /wp-json/batch/v1 call by default
+BATCH_MAX_REQUESTS = 25
+
+# Upper bound on batch calls sent at the same time
+BATCH_WORKERS = 8
+
+# Longest wait before any retry, whatever Retry-After asks for
+RETRY_MAX_DELAY = 30  # seconds
+
+class CappedRetry(Retry):
+    """Retry that never sleeps longer than RETRY_MAX_DELAY, even for Retry-After."""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, RETRY_MAX_DELAY)
+
+# Transient failures retried for idempotent methods (GET, PUT, DELETE, ...)
+HTTP_RETRIES = CappedRetry(
+    total=3,
+    backoff_factor=0.3,
+    backoff_max=RETRY_MAX_DELAY,
+    status_forcelist=(429, 500, 502, 503, 504),
+    raise_on_status=False
+)
+
+# POSTs are not idempotent, so they are only retried when WordPress turned
+# the request away without handling it
+POST_RETRY_STATUSES = (429, 503)
+POST_RETRY_ATTEMPTS = 3
+
+# Every page's blocks are wrapped in Group -> Columns -> Column (with Narrow style)
+GUTENBERG_WRAPPER_START = """
+<!-- wp:group {"layout":{"type":"constrained"}} -->
+<div class="wp-block-group">
+<!-- wp:columns -->
+<div class="wp-block-columns">
+<!-- wp:column {"className":"is-style-narrow is-style-fs-column-narrow"} -->
+<div class="wp-block-column is-style-narrow is-style-fs-column-narrow">
+"""
+GUTENBERG_WRAPPER_END = """
+</div>
+<!-- /wp:column -->
+</div>
+<!-- /wp:columns -->
+</div>
+<!-- /wp:group -->
+"""
 
 class WordPressAPI:
     """WordPress REST API client for migrating content."""
@@ -14,6 +74,13 @@ class WordPressAPI:
         self.password = password
         self.timeout = timeout
         self.session = requests.Session()
+        self._batch_routes = {}  # (REST route, method) -> whether the batch endpoint accepts it
+        
+        # Reuse keep-alive connections across calls and from worker threads.
+        # POST is not retried so a slow create can't produce duplicate pages.
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=HTTP_RETRIES)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         # Set up authentication headers
         credentials = f"{username}:{password}"
@@ -50,43 +117,13 @@ class WordPressAPI:
     def create_page(self, title, slug, content_blocks, parent_id=None, status='publish', template=''):
         """Create a WordPress page with Gutenberg blocks."""
         try:
-            # Convert content blocks to Gutenberg format
-            gutenberg_content = self._convert_to_gutenberg(content_blocks)
-            
-            page_data = {
-                'title': title,
-                'slug': slug,
-                'content': gutenberg_content,
-                'status': status,
-                'type': 'page'
-            }
-            
-            # Set parent if specified (for hierarchy)
-            if parent_id:
-                page_data['parent'] = parent_id
-
-            # Set page template if specified
-            if template:
-                page_data['template'] = template
-            
-            response = self._make_request('POST', '/wp-json/wp/v2/pages', data=page_data)
+            page_data = self._build_page_data(title, slug, content_blocks, parent_id, status, template)
+            response = self._post_with_retry('/wp-json/wp/v2/pages', page_data)
             
             if response.status_code == 201:
-                page_info = response.json()
-                return {
-                    'success': True,
-                    'message': f"Page '{title}' created successfully",
-                    'page_id': page_info['id'],
-                    'url': page_info['link'],
-                    'data': page_info
-                }
-            else:
-                error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-                return {
-                    'success': False,
-                    'message': f"Failed to create page '{title}': {response.status_code}",
-                    'error': error_data
-                }
+                return self._page_result(title, 201, response.json())
+            error_data = response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
+            return self._page_result(title, response.status_code, error_data)
                 
         except Exception as e:
             return {
@@ -95,6 +132,117 @@ class WordPressAPI:
                 'error': str(e)
             }
     
+    def create_pages_bulk(self, pages):
+        """Create several pages through the WordPress batch endpoint (5.6+).
+        
+        Each item holds create_page keyword arguments. Results come back in
+        the same order and shape as create_page. The pages are split into
+        calls of at most BATCH_MAX_REQUESTS, sent concurrently. Sites without
+        batch support get one create_page call per page instead.
+        """
+        if not pages:
+            return []
+        if not self.supports_batch('/wp/v2/pages'):
+            return [self.create_page(**page) for page in pages]
+        
+        chunks = [pages[start:start + BATCH_MAX_REQUESTS]
+                  for start in range(0, len(pages), BATCH_MAX_REQUESTS)]
+        if len(chunks) == 1:
+            return self._create_pages_batch(chunks[0])
+        with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(chunks))) as executor:
+            return [result for chunk_results in executor.map(self._create_pages_batch, chunks)
+                    for result in chunk_results]
+    
+    def _create_pages_batch(self, chunk):
+        """Create up to BATCH_MAX_REQUESTS pages with a single batch call."""
+        try:
+            requests_list = [{
+                'method': 'POST',
+                'path': '/wp/v2/pages',
+                'body': self._build_page_data(**page)
+            } for page in chunk]
+            responses = self.batch_request(requests_list)
+            return [self._page_result(page['title'], item.get('status'), item.get('body'))
+                    for page, item in zip(chunk, responses)]
+        except Exception as e:
+            # The batch may have been applied, so don't resend it page by page
+            return [{
+                'success': False,
+                'message': f"Error creating page '{page['title']}': {str(e)}",
+                'error': str(e)
+            } for page in chunk]
+    
+    def batch_request(self, requests_list):
+        """Send several REST requests in one call to /wp-json/batch/v1.
+        
+        Each request is a dict with 'method', 'path' (relative to /wp-json)
+        and 'body'; at most BATCH_MAX_REQUESTS fit in one call. Returns the
+        per-request responses ({'status', 'body', ...}) in order, and raises
+        if the batch call itself fails.
+        """
+        response = self._post_with_retry('/wp-json/batch/v1', {
+            'validation': 'normal',
+            'requests': requests_list
+        })
+        if response.status_code not in (200, 207):
+            raise Exception(f"batch request returned {response.status_code}")
+        responses = response.json().get('responses', [])
+        if len(responses) != len(requests_list):
+            raise Exception("batch response does not match the request")
+        return responses
+    
+    def supports_batch(self, route, method='POST'):
+        """Check whether requests to a REST route (e.g. '/wp/v2/pages') can be batched."""
+        key = (route, method)
+        if key not in self._batch_routes:
+            supported = False
+            try:
+                response = self._make_request('OPTIONS', f'/wp-json{route}')
+                if response.status_code == 200:
+                    supported = any(
+                        method in endpoint.get('methods', []) and endpoint.get('allow_batch', {}).get('v1')
+                        for endpoint in response.json().get('endpoints', [])
+                    )
+            except Exception:
+                pass
+            self._batch_routes[key] = supported
+        return self._batch_routes[key]
+    
+    def _build_page_data(self, title, slug, content_blocks, parent_id=None, status='publish', template=''):
+        """Build the REST payload for a new page."""
+        page_data = {
+            'title': title,
+            'slug': slug,
+            'content': self._convert_to_gutenberg(content_blocks),
+            'status': status,
+            'type': 'page'
+        }
+        
+        # Set parent if specified (for hierarchy)
+        if parent_id:
+            page_data['parent'] = parent_id
+
+        # Set page template if specified
+        if template:
+            page_data['template'] = template
+        return page_data
+    
+    def _page_result(self, title, status_code, body):
+        """Turn the response to a page POST into a create_page result."""
+        if status_code == 201:
+            return {
+                'success': True,
+                'message': f"Page '{title}' created successfully",
+                'page_id': body['id'],
+                'url': body['link'],
+                'data': body
+            }
+        return {
+            'success': False,
+            'message': f"Failed to create page '{title}': {status_code}",
+            'error': body
+        }
+    
     def get_page_by_slug(self, slug):
         """Check if a page with the given slug already exists."""
         try:
@@ -106,6 +254,51 @@ class WordPressAPI:
         except Exception:
             return None
     
+    def get_pages_list(self, fields=('id', 'slug'), per_page=100):
+        """Fetch all published pages, following pagination. Returns None on failure."""
+        return self.get_collection('/wp-json/wp/v2/pages', fields, per_page)
+    
+    def get_pages_by_slugs(self, slugs, chunk_size=100):
+        """Fetch the pages matching any of the given slugs. Returns None on failure."""
+        pages = []
+        for start in range(0, len(slugs), chunk_size):
+            chunk = self.get_collection(f"/wp-json/wp/v2/pages?slug={','.join(slugs[start:start + chunk_size])}", ('id', 'slug'))
+            if chunk is None:
+                return None
+            pages.extend(chunk)
+        return pages
+    
+    def get_collection(self, endpoint, fields, per_page=100):
+        """Fetch every item of a REST collection, following pagination. Returns None on failure.
+        
+        Only the given fields are requested. The first result page reports
+        how many there are; the rest are then requested concurrently.
+        """
+        separator = '&' if '?' in endpoint else '?'
+        endpoint = f"{endpoint}{separator}per_page={per_page}&_fields={','.join(fields)}&page="
+        try:
+            response = self._make_request('GET', f"{endpoint}1")
+            if response.status_code != 200:
+                return None
+            items = response.json()
+            total_pages = int(response.headers.get('X-WP-TotalPages', 1))
+            if total_pages <= 1:
+                return items
+            
+            page_numbers = range(2, total_pages + 1)
+            with ThreadPoolExecutor(max_workers=min(PAGINATION_WORKERS, len(page_numbers))) as executor:
+                responses = list(executor.map(
+                    lambda page_number: self._make_request('GET', f"{endpoint}{page_number}"),
+                    page_numbers
+                ))
+            for response in responses:
+                if response.status_code != 200:
+                    return None
+                items.extend(response.json())
+            return items
+        except Exception:
+            return None
+    
     def create_menu(self, menu_name, menu_items):
         """Create a WordPress menu with hierarchical structure."""
         try:
@@ -134,30 +327,30 @@ class WordPressAPI:
     
     def _convert_to_gutenberg(self, content_blocks):
         """Convert parsed content blocks to Gutenberg block format wrapped in Group -> Column -> Narrow."""
-        inner_content = ""
+        parts = []
         
         for block in content_blocks:
             if block['type'] == 'heading':
                 # Create heading block
-                inner_content += f"""
+                parts.append(f"""
 <!-- wp:heading -->
 <h2 class="wp-block-heading">{self._escape_html(block['text'])}</h2>
 <!-- /wp:heading -->
 
-"""
+""")
             elif block['type'] == 'paragraph':
                 # Create paragraph block
-                inner_content += f"""
+                parts.append(f"""
 <!-- wp:paragraph -->
 <p>{self._escape_html(block['text'])}</p>
 <!-- /wp:paragraph -->
 
-"""
+""")
             elif block['type'] == 'button':
                 # Create button block (skip if no text)
                 if block.get('text'):
                     href = block.get('href', '#')
-                    inner_content += f"""
+                    parts.append(f"""
 <!-- wp:buttons -->
 <div class="wp-block-buttons">
 <!-- wp:button -->
@@ -166,48 +359,38 @@ class WordPressAPI:
 </div>
 <!-- /wp:buttons -->
 
-"""
+""")
             # Skip image blocks as requested
-            
-        # Wrap all content in Group -> Columns -> Column (with Narrow style)
-        return f"""
-<!-- wp:group {{"layout":{{"type":"constrained"}}}} -->
-<div class="wp-block-group">
-<!-- wp:columns -->
-<div class="wp-block-columns">
-<!-- wp:column {{"className":"is-style-narrow is-style-fs-column-narrow"}} -->
-<div class="wp-block-column is-style-narrow is-style-fs-column-narrow">
-{inner_content.rstrip()}
-</div>
-<!-- /wp:column -->
-</div>
-<!-- /wp:columns -->
-</div>
-<!-- /wp:group -->
-"""
+        
+        return GUTENBERG_WRAPPER_START + ''.join(parts).rstrip() + GUTENBERG_WRAPPER_END
     
     def _escape_html(self, text):
-        """Escape HTML characters in text."""
-        return (text.replace('&', '&amp;')
-                   .replace('<', '&lt;')
-                   .replace('>', '&gt;')
-                   .replace('"', '&quot;')
-                   .replace("'", '&#x27;'))
+        """Escape HTML characters in text, including both quote characters."""
+        return html.escape(text, quote=True)
     
     def _make_request(self, method, endpoint, data=None):
         """Make a request to the WordPress REST API."""
-        url = urljoin(self.site_url, endpoint)
+        # site_url has no trailing slash and every endpoint starts with one
+        url = self.site_url + endpoint
         
-        if method.upper() == 'GET':
-            return self.session.get(url, timeout=self.timeout)
-        elif method.upper() == 'POST':
-            return self.session.post(url, json=data, timeout=self.timeout)
-        elif method.upper() == 'PUT':
-            return self.session.put(url, json=data, timeout=self.timeout)
-        elif method.upper() == 'DELETE':
-            return self.session.delete(url, timeout=self.timeout)
-        else:
+        method = method.upper()
+        sends_body = REQUEST_METHODS.get(method)
+        if sends_body is None:
             raise ValueError(f"Unsupported HTTP method: {method}")
+        # The session already sends Content-Type: application/json
+        body = json_utils.dumps_bytes(data) if sends_body and data is not None else None
+        return self.session.request(method, url, data=body, timeout=self.timeout)
+    
+    def _post_with_retry(self, endpoint, data):
+        """POST to the REST API, retrying with backoff while the server refuses it (429/503)."""
+        for attempt in range(POST_RETRY_ATTEMPTS + 1):
+            response = self._make_request('POST', endpoint, data=data)
+            if response.status_code not in POST_RETRY_STATUSES or attempt == POST_RETRY_ATTEMPTS:
+                return response
+            # Honour Retry-After (in seconds) when given, otherwise back off exponentially
+            retry_after = response.headers.get('Retry-After', '')
+            delay = int(retry_after) if retry_after.isdigit() else HTTP_RETRIES.backoff_factor * (2 ** attempt)
+            time.sleep(min(delay, RETRY_MAX_DELAY))
     
     def get_site_info(self):
         """Get basic site information."""
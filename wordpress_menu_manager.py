@@ -1,6 +1,15 @@
 import requests
 import json
-from urllib.parse import urljoin
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from wordpress_api import BATCH_MAX_REQUESTS
+import json_utils
+
+# Upper bound on menu requests (items of one depth level, stale menu deletes)
+# sent at the same time when the batch endpoint is not available
+MENU_ITEM_WORKERS = 8
 
 class WordPressMenuCreator:
     """Creates WordPress menus using native WordPress 6.8+ REST API endpoints."""
@@ -8,12 +17,30 @@ class WordPressMenuCreator:
     def __init__(self, wp_api):
         """Initialize with WordPress API client."""
         self.wp_api = wp_api
+        self._site_host = urlparse(wp_api.site_url).netloc.lower()
+        self._menus_cache = None  # Menus listed from WordPress, until one is created or deleted
     
     def create_menu_with_native_api(self, menu_items, page_mapping, menu_name="Main Navigation"):
         """Create menu using native WordPress REST API endpoints (WordPress 6.8+)."""
         try:
-            # Step 1: Create the menu using /wp/v2/menus
-            menu_result = self._create_menu(menu_name)
+            # Skip the rebuild when the same menu was already created from the same data
+            signature = self._menu_signature(menu_items, page_mapping)
+            for menu in self._get_existing_menus():
+                if (menu.get('name') == menu_name and 'primary' in (menu.get('locations') or [])
+                        and self._description_text(menu).endswith(f'[sig:{signature}]')):
+                    return {
+                        'success': True,
+                        'message': f"Menu '{menu_name}' is already up to date",
+                        'menu_id': menu['id'],
+                        'items_added': 0
+                    }
+            
+            # Step 1: Create the menu using /wp/v2/menus. Whether the items can be
+            # batched doesn't depend on the menu, so that is checked meanwhile
+            # (the answer is cached for step 2).
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(self.wp_api.supports_batch, '/wp/v2/menu-items')
+                menu_result = self._create_menu(menu_name, signature)
             if not menu_result['success']:
                 return menu_result
             
@@ -21,13 +48,18 @@ class WordPressMenuCreator:
             
             # Step 2: Add menu items with hierarchy using /wp/v2/menu-items
             items_result = self._add_menu_items_hierarchical(menu_id, menu_items, page_mapping)
+            if items_result['items_added'] != items_result.get('items_total'):
+                # An incomplete menu must not be skipped by the next migration
+                self._clear_menu_signature(menu_id, menu_name)
             if not items_result['success']:
                 return items_result
             
-            # Step 3: Assign menu to 'primary' theme location
-            assign_result = self._assign_menu_to_primary_location(menu_id)
-            if not assign_result['success']:
-                return assign_result
+            # Step 3: Assign menu to 'primary' theme location, unless the create
+            # request already did (older WordPress ignores 'locations' there)
+            if not menu_result['assigned_to_primary']:
+                assign_result = self._assign_menu_to_primary_location(menu_id)
+                if not assign_result['success']:
+                    return assign_result
             
             return {
                 'success': True,
@@ -43,29 +75,33 @@ class WordPressMenuCreator:
                 'error': str(e)
             }
     
-    def _create_menu(self, menu_name):
+    def _create_menu(self, menu_name, signature=None):
         """Create a new navigation menu using WordPress native REST API."""
         try:
             # Delete existing menu with the same name first
-            existing_menus = self._get_existing_menus()
-            for menu in existing_menus:
-                if menu.get('name') == menu_name:
-                    self._delete_menu(menu['id'])
+            stale_ids = [menu['id'] for menu in self._get_existing_menus() if menu.get('name') == menu_name]
+            if stale_ids:
+                self._delete_menus(stale_ids)
             
             # Create new menu
+            description = f'Migrated navigation menu: {menu_name}'
+            if signature:
+                description += f' [sig:{signature}]'
             menu_data = {
                 'name': menu_name,
-                'description': f'Migrated navigation menu: {menu_name}',
+                'description': description,
                 'locations': ['primary']  # Assign to primary location
             }
             
-            response = self.wp_api._make_request('POST', '/wp-json/wp/v2/menus', data=menu_data)
+            response = self.wp_api._post_with_retry('/wp-json/wp/v2/menus', menu_data)
             
             if response.status_code == 201:
+                self._menus_cache = None
                 menu_info = response.json()
                 return {
                     'success': True,
                     'menu_id': menu_info['id'],
+                    'assigned_to_primary': 'primary' in (menu_info.get('locations') or []),
                     'message': f"Menu '{menu_name}' created"
                 }
             else:
@@ -84,120 +120,152 @@ class WordPressMenuCreator:
             }
     
     def _get_existing_menus(self):
-        """Get all existing menus."""
-        try:
-            response = self.wp_api._make_request('GET', '/wp-json/wp/v2/menus')
-            if response.status_code == 200:
-                return response.json()
-            return []
-        except Exception:
-            return []
+        """Get all existing menus (only the fields needed to match and reuse them)."""
+        if self._menus_cache is None:
+            menus = self.wp_api.get_collection('/wp-json/wp/v2/menus', fields=('id', 'name', 'description', 'locations'))
+            if menus is None:
+                return []
+            self._menus_cache = menus
+        return self._menus_cache
+    
+    def _delete_menus(self, menu_ids):
+        """Delete several menus, in one batch request when the site supports it."""
+        if len(menu_ids) > 1 and self.wp_api.supports_batch(f'/wp/v2/menus/{menu_ids[0]}', 'DELETE'):
+            try:
+                self.wp_api.batch_request([{
+                    'method': 'DELETE',
+                    'path': f'/wp/v2/menus/{menu_id}?force=true'
+                } for menu_id in menu_ids])
+                self._menus_cache = None
+                return
+            except Exception:
+                pass
+        with ThreadPoolExecutor(max_workers=min(MENU_ITEM_WORKERS, len(menu_ids))) as executor:
+            list(executor.map(self._delete_menu, menu_ids))
     
     def _delete_menu(self, menu_id):
         """Delete an existing menu."""
         try:
-            response = self.wp_api._make_request('DELETE', f'/wp-json/wp/v2/menus/{menu_id}')
-            return response.status_code == 200
+            # Menus can't be trashed, so the delete has to be forced
+            response = self.wp_api._make_request('DELETE', f'/wp-json/wp/v2/menus/{menu_id}?force=true')
+            if response.status_code == 200:
+                self._menus_cache = None
+                return True
+            return False
         except Exception:
             return False
     
     def _add_menu_items_hierarchical(self, menu_id, menu_items, page_mapping):
         """Add menu items to the menu with proper hierarchy."""
-        items_added = 0
-        item_id_mapping = {}  # Maps order to WordPress menu item ID for parent relationships
+        # WordPress menu item ID by order (orders run 1..N), 0 until the item is created
+        item_id_mapping = []
+        
+        # Normalize the page slugs once so menu links match however they are formatted
+        page_mapping = {self._normalize_url(slug): page_id for slug, page_id in page_mapping.items()}
         
         try:
             # Process items in order to maintain hierarchy
             flattened_items = self._flatten_menu_items(menu_items)
             
-            for item_data in flattened_items:
-                result = self._create_menu_item(menu_id, item_data, page_mapping, item_id_mapping)
-                if result['success']:
-                    items_added += 1
-                    item_id_mapping[item_data['order']] = result['menu_item_id']
+            # An item only needs its parent's ID, so a whole depth level can
+            # be sent at once after the level above has been created
+            levels = self._group_by_depth(flattened_items)
+            items_total = sum(len(level) for level in levels)
+            item_id_mapping = [0] * (items_total + 1)
+            batch = self.wp_api.supports_batch('/wp/v2/menu-items')
+            for level in levels:
+                if batch:
+                    self._add_menu_items_batched(menu_id, level, page_mapping, item_id_mapping)
+                    continue
+                with ThreadPoolExecutor(max_workers=min(MENU_ITEM_WORKERS, len(level))) as executor:
+                    results = list(executor.map(
+                        lambda item_data: self._create_menu_item(menu_id, item_data, page_mapping, item_id_mapping),
+                        level
+                    ))
+                for item_data, result in zip(level, results):
+                    if result['success']:
+                        item_id_mapping[item_data['order']] = result['menu_item_id']
             
             return {
                 'success': True,
-                'items_added': items_added
+                'items_added': sum(map(bool, item_id_mapping)),
+                'items_total': items_total
             }
             
         except Exception as e:
             return {
                 'success': False,
                 'message': f"Error adding menu items: {str(e)}",
-                'items_added': items_added
+                'items_added': sum(map(bool, item_id_mapping))
             }
     
-    def _flatten_menu_items(self, menu_items, parent_order=None, order_counter=None):
-        """Flatten hierarchical menu items while preserving parent relationships."""
-        if order_counter is None:
-            order_counter = [0]  # Use list to make it mutable
+    def _add_menu_items_batched(self, menu_id, level, page_mapping, item_id_mapping):
+        """Create one depth level of menu items through the batch endpoint."""
+        for start in range(0, len(level), BATCH_MAX_REQUESTS):
+            chunk = level[start:start + BATCH_MAX_REQUESTS]
+            responses = self.wp_api.batch_request([{
+                'method': 'POST',
+                'path': '/wp/v2/menu-items',
+                'body': self._build_menu_item_data(menu_id, item_data, page_mapping, item_id_mapping)
+            } for item_data in chunk])
+            for item_data, response in zip(chunk, responses):
+                if response.get('status') == 201:
+                    item_id_mapping[item_data['order']] = response['body']['id']
+    
+    def _group_by_depth(self, flattened_items):
+        """Split flattened menu items into levels, top level first, keeping their order."""
+        depths = {}
+        levels = defaultdict(list)
+        for item_data in flattened_items:
+            # Parents come before their children in the flattened list
+            depth = depths[item_data['order']] = depths.get(item_data['parent_order'], -1) + 1
+            levels[depth].append(item_data)
+        return [levels[depth] for depth in sorted(levels)]
+    
+    def _flatten_menu_items(self, menu_items):
+        """Flatten hierarchical menu items while preserving parent relationships.
         
-        flattened = []
+        Yields items depth-first, each parent before its children, numbered
+        in that order.
+        """
+        order = 0
+        # Stack of (item, parent order); pushed in reverse so items pop in menu order
+        stack = [(item, None) for item in reversed(menu_items)]
         
-        for item in menu_items:
-            order_counter[0] += 1
-            current_order = order_counter[0]
+        while stack:
+            item, parent_order = stack.pop()
+            order += 1
             
-            # Map from parser format to menu creator format
-            # Parser uses: 'title' and 'slug' fields
-            # Menu creator expects: 'text' and 'href' fields
-            title = item.get('title', item.get('text', 'Untitled'))
-            url = item.get('slug', item.get('href', '#'))
+            title, url, children = self._menu_item_fields(item)
             
-            flattened_item = {
+            yield {
                 'title': title,
                 'url': url,
-                'order': current_order,
+                'order': order,
                 'parent_order': parent_order
             }
             
-            flattened.append(flattened_item)
-            
-            # Process children recursively
-            # Parser uses 'submenu' field, menu creator expects 'children'
-            children = item.get('submenu', item.get('children', []))
             if children:
-                child_items = self._flatten_menu_items(
-                    children, 
-                    current_order, 
-                    order_counter
-                )
-                flattened.extend(child_items)
+                stack.extend((child, order) for child in reversed(children))
+    
+    def _menu_item_fields(self, item):
+        """Return (title, url, children) of a menu item in either input format.
         
-        return flattened
+        The parser writes 'title', 'slug' and 'submenu'; other callers pass
+        'text', 'href' and 'children'. The fallback key is only looked up
+        when the parser's key is missing.
+        """
+        title = item['title'] if 'title' in item else item.get('text', 'Untitled')
+        url = item['slug'] if 'slug' in item else item.get('href', '#')
+        children = item['submenu'] if 'submenu' in item else item.get('children')
+        return title, url, children
     
     def _create_menu_item(self, menu_id, item_data, page_mapping, item_id_mapping):
         """Create a single menu item."""
         try:
-            menu_item_data = {
-                'title': item_data['title'],
-                'menu_order': item_data['order'],
-                'menus': menu_id,
-                'status': 'publish'
-            }
+            menu_item_data = self._build_menu_item_data(menu_id, item_data, page_mapping, item_id_mapping)
             
-            # Handle parent relationships
-            if item_data['parent_order'] and item_data['parent_order'] in item_id_mapping:
-                menu_item_data['parent'] = item_id_mapping[item_data['parent_order']]
-            
-            # Determine item type and object
-            href = item_data['url']
-            if href in page_mapping:
-                # Link to WordPress page
-                menu_item_data.update({
-                    'type': 'post_type',
-                    'object': 'page',
-                    'object_id': page_mapping[href]
-                })
-            else:
-                # Custom URL
-                menu_item_data.update({
-                    'type': 'custom',
-                    'url': href
-                })
-            
-            response = self.wp_api._make_request('POST', '/wp-json/wp/v2/menu-items', data=menu_item_data)
+            response = self.wp_api._post_with_retry('/wp-json/wp/v2/menu-items', menu_item_data)
             
             if response.status_code == 201:
                 menu_item_info = response.json()
@@ -221,6 +289,82 @@ class WordPressMenuCreator:
                 'error': str(e)
             }
     
+    def _build_menu_item_data(self, menu_id, item_data, page_mapping, item_id_mapping):
+        """Build the REST payload for a menu item."""
+        menu_item_data = {
+            'title': item_data['title'],
+            'menu_order': item_data['order'],
+            'menus': menu_id,
+            'status': 'publish'
+        }
+        
+        # Handle parent relationships
+        parent_id = item_id_mapping[item_data['parent_order']] if item_data['parent_order'] else 0
+        if parent_id:
+            menu_item_data['parent'] = parent_id
+        
+        # Determine item type and object
+        href = item_data['url']
+        page_id = page_mapping.get(self._normalize_url(href))
+        if page_id is not None:
+            # Link to WordPress page
+            menu_item_data.update({
+                'type': 'post_type',
+                'object': 'page',
+                'object_id': page_id
+            })
+        else:
+            # Custom URL
+            menu_item_data.update({
+                'type': 'custom',
+                'url': href
+            })
+        return menu_item_data
+    
+    def _menu_signature(self, menu_items, page_mapping):
+        """Hash the menu structure and the pages it links to."""
+        data = json_utils.dumps_bytes([menu_items, sorted(page_mapping.items())])
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    
+    def _description_text(self, menu):
+        """Return a menu's description, whichever form the API sent it in."""
+        description = menu.get('description') or ''
+        if isinstance(description, dict):
+            description = description.get('raw') or description.get('rendered') or ''
+        return description.strip()
+    
+    def _clear_menu_signature(self, menu_id, menu_name):
+        """Drop the signature from a menu's description so it gets rebuilt next time."""
+        try:
+            self.wp_api._make_request('PUT', f'/wp-json/wp/v2/menus/{menu_id}', data={
+                'description': f'Migrated navigation menu: {menu_name}'
+            })
+            self._menus_cache = None
+        except Exception:
+            pass
+    
+    def _normalize_url(self, url):
+        """Reduce a menu link or page slug to a comparable path ('https://site/About.html' -> '/about').
+        
+        Links to other hosts, mailto:/tel: links and links with a query or
+        anchor are returned unchanged, so they stay custom links.
+        """
+        parsed = urlparse(url)
+        if parsed.query or parsed.fragment:
+            return url
+        if parsed.scheme or parsed.netloc:
+            if parsed.scheme not in ('http', 'https', '') or parsed.netloc.lower() != self._site_host:
+                return url
+        elif not parsed.path:
+            return url
+        
+        path = parsed.path.strip('/').lower()
+        if path.endswith('.html'):
+            path = path[:-len('.html')]
+        if path == 'index':
+            path = ''
+        return '/' + path
+    
     def _assign_menu_to_primary_location(self, menu_id):
         """Assign menu to primary theme location."""
         try:
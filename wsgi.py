@@ -0,0 +1,12 @@
+"""WSGI entry point for running the app under a production server.
+
+    gunicorn -k gthread -w 1 --threads 16 wsgi:app
+
+Keep a single worker process: running migrations, the project registry and
+the session secret all live in process memory. Threads handle concurrency,
+which suits the workload since requests mostly wait on disk and WordPress.
+"""
+from app import app
+
+if __name__ == "__main__":
+    app.run()